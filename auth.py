@@ -1,45 +1,432 @@
 import json
+import math
 import os
+import atexit
+import hmac
 import hashlib
 import secrets
+import tempfile
+import threading
+
+from filelock import FileLock
+from ranking import ScoreIndex
 
 USER_FILE = "users.json"
+STORAGE_BACKEND = os.environ.get("SNAKE_STORAGE", "json")  # "json" 或 "sqlite"
+SHARD_COUNT = int(os.environ.get("SNAKE_SHARDS", 1))  # 大於 1 時依用戶名把資料分散到多個檔案
+FLUSH_DELAY = 1.0  # 寫回延遲（秒），期間的修改會合併成一次寫入
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"  # 多個行程共用 users.json 時協調寫入的鎖檔
+COMPACT_THRESHOLD = 1024 * 1024  # 日誌超過此大小（位元組）就合併回快照
+
+# 密碼哈希設定，格式為 "演算法$參數...$鹽值$哈希"，參數變更後舊密碼會在登入時自動重新哈希
+HASH_SCHEME = os.environ.get("SNAKE_HASH_SCHEME", "scrypt")  # "scrypt" 或 "pbkdf2_sha256"
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 200000
+
+if HASH_SCHEME == "scrypt" and not hasattr(hashlib, "scrypt"):
+    HASH_SCHEME = "pbkdf2_sha256"
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                          maxmem=256 * n * r * p).hex()
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations).hex()
 
-def hash_password(password, salt=None):
-    """使用 SHA-256 和鹽值對密碼進行哈希"""
+def hash_password(password, salt=None, scheme=None):
+    """使用 scrypt 或 PBKDF2 和鹽值對密碼進行哈希"""
     if salt is None:
         salt = secrets.token_hex(16)
-    password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${password_hash}"
+    scheme = scheme or HASH_SCHEME
+    if scheme == "scrypt":
+        password_hash = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt}${password_hash}"
+    if scheme == "pbkdf2_sha256":
+        password_hash = _pbkdf2(password, salt, PBKDF2_ITERATIONS)
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt}${password_hash}"
+    raise ValueError(f"不支援的哈希演算法: {scheme}")
 
 def verify_password(password, hashed_password):
+    """驗證密碼，支援 scrypt、PBKDF2 以及舊版的 "鹽值$SHA-256" 格式"""
     try:
-        salt, stored_hash = hashed_password.split('$')
-        password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        return password_hash == stored_hash
+        parts = hashed_password.split('$')
+        if parts[0] == "scrypt":
+            n, r, p, salt, stored_hash = parts[1:]
+            password_hash = _scrypt(password, salt, int(n), int(r), int(p))
+        elif parts[0] == "pbkdf2_sha256":
+            iterations, salt, stored_hash = parts[1:]
+            password_hash = _pbkdf2(password, salt, int(iterations))
+        else:
+            salt, stored_hash = parts
+            password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(password_hash, stored_hash)
     except ValueError:
         return False
 
+def needs_rehash(hashed_password):
+    """密碼哈希是否使用了舊的演算法或參數"""
+    if HASH_SCHEME == "scrypt":
+        current = f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$"
+    else:
+        current = f"pbkdf2_sha256${PBKDF2_ITERATIONS}$"
+    return not hashed_password.startswith(current)
+
+class UserStore:
+    """用戶資料存放區：啟動時讀取 users.json 快照並重播日誌，之後由記憶體提供讀取。
+    修改以一行記錄附加到日誌檔（延遲後批次 fsync），日誌超過門檻時在背景合併回快照。
+
+    多個行程可以共用同一組檔案：寫入前先取得檔案鎖並讀入其他行程新增的日誌記錄，
+    讀取前以 stat 檢查檔案是否有變化。修改採樂觀檢查，只有該用戶在期間被其他行程
+    改過時才依最新資料重新產生這一筆記錄"""
+
+    def __init__(self, path=USER_FILE, flush_delay=FLUSH_DELAY,
+                 compact_threshold=COMPACT_THRESHOLD):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.file_lock = FileLock(path + LOCK_SUFFIX)
+        self.flush_delay = flush_delay
+        self.compact_threshold = compact_threshold
+        self._users = None
+        self._index = None
+        self._versions = {}  # 用戶名 -> 載入快照後套用過的日誌記錄數
+        self._generation = 0  # 每次完整重新讀取就加一，舊的版本號一律視為過期
+        self._snapshot_state = None
+        self._journal_state = None  # (inode, 已套用的位元組數, 已看到的檔案大小)
+        self._dirty = False
+        self._timer = None
+        self._compacting = False
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        """讀入其他行程的修改；檔案都沒有變化時只需要兩次 stat"""
+        snapshot = self._stat(self.path)
+        journal = self._stat(self.journal_path)
+        with self._lock:
+            if (self._users is not None and snapshot == self._snapshot_state and
+                    journal is not None and self._journal_state is not None and
+                    journal[0] == self._journal_state[0] and journal[2] == self._journal_state[2]):
+                return
+        # 鎖的順序固定為先檔案鎖、再執行緒鎖
+        with self.file_lock, self._lock:
+            self._sync()
+
+    def _sync(self):
+        """持有檔案鎖時呼叫：快照或日誌被換掉就完整重新讀取，否則只讀日誌新增的部分"""
+        snapshot = self._stat(self.path)
+        journal = self._stat(self.journal_path)
+        if (self._users is None or snapshot != self._snapshot_state or journal is None or
+                self._journal_state is None or journal[0] != self._journal_state[0] or
+                journal[2] < self._journal_state[1]):
+            self._load_all()
+        elif journal[2] != self._journal_state[2]:
+            self._read_journal(self._journal_state[1])
+
+    def _load_all(self):
+        if not os.path.exists(self.path):
+            self._write_snapshot({})
+        try:
+            with open(self.path, "r", encoding='utf-8') as f:
+                self._users = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            self._users = {}
+        self._snapshot_state = self._stat(self.path)
+        self._versions = {}
+        self._generation += 1
+        self._index = None
+
+        if not os.path.exists(self.journal_path):
+            open(self.journal_path, "ab").close()
+        self._read_journal(0)
+        self._build_index()
+
+    def _build_index(self):
+        self._index = ScoreIndex({name: data.get("high_score", 0)
+                                  for name, data in self._users.items()})
+
+    def _read_journal(self, offset):
+        with open(self.journal_path, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            data = f.read()
+        # 最後一行可能還沒寫完（或因為當機只寫了一半），留到下次再讀
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self._apply(entry)
+        self._journal_state = (inode, offset + end, offset + len(data))
+
+    def _apply(self, entry):
+        username = entry["user"]
+        if entry["op"] == "add":
+            self._users[username] = dict(entry["data"])
+        elif entry["op"] == "set" and username in self._users:
+            self._users[username].update(entry["fields"])
+        elif entry["op"] == "delete" and username in self._users:
+            del self._users[username]
+        else:
+            return
+        self._versions[username] = self._versions.get(username, 0) + 1
+        if self._index is None:
+            return
+        if username in self._users:
+            self._index.set(username, self._users[username].get("high_score", 0))
+        else:
+            self._index.remove(username)
+
+    def _version(self, username):
+        return self._generation, self._versions.get(username, 0)
+
+    def _write_snapshot(self, users):
+        """寫入暫存檔後再以 os.replace 取代，避免寫到一半留下損毀的檔案"""
+        self._replace_file(self.path, json.dumps(users, ensure_ascii=False).encode())
+
+    def _replace_file(self, path, data):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".users-", suffix=".tmp", dir=directory)
+        try:
+            mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+            os.chmod(tmp_path, mode)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _reset_journal(self):
+        """以新的空檔案取代日誌，其他行程會因為 inode 改變而重新讀取"""
+        self._replace_file(self.journal_path, b"")
+        self._snapshot_state = self._stat(self.path)
+        self._journal_state = (os.stat(self.journal_path).st_ino, 0, 0)
+
+    def _append(self, entry):
+        """持有檔案鎖且剛 _sync() 過時呼叫，把記錄附加到日誌"""
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode()
+        inode, offset, seen = self._journal_state
+        if seen > offset:
+            # 先結束前一個行程中斷時留下的半行，讓它成為獨立的一行被略過
+            line = b"\n" + line
+        with open(self.journal_path, "ab") as f:
+            f.write(line)
+        self._apply(entry)
+        self._journal_state = (inode, seen + len(line), seen + len(line))
+
+        self._dirty = True
+        if self.flush_delay <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _commit(self, username, build):
+        """樂觀更新單一用戶。build(目前的資料或 None) 回傳日誌記錄，回傳 None 表示不需修改。
+
+        先在記憶體中產生記錄，取得檔案鎖並讀入其他行程的修改後，若這個用戶的版本
+        沒有改變就直接寫入，否則只依這個用戶的最新資料重新產生一次。
+        寫入日誌失敗時拋出 OSError，與「不需修改」區分"""
+        self._refresh()
+        with self._lock:
+            version = self._version(username)
+            entry = build(self._users.get(username))
+        if entry is None:
+            return False
+
+        with self.file_lock, self._lock:
+            self._sync()
+            if self._version(username) != version:
+                entry = build(self._users.get(username))
+                if entry is None:
+                    return False
+            self._append(entry)
+            return True
+
+    def _try_commit(self, username, build):
+        """同 _commit，寫入失敗時印出錯誤並回傳 False"""
+        try:
+            return self._commit(username, build)
+        except OSError as e:
+            print(f"保存用戶資料時發生錯誤: {e}")
+            return False
+
+    def get(self, username):
+        """取得用戶資料的副本，不存在時回傳 None"""
+        self._refresh()
+        with self._lock:
+            user = self._users.get(username)
+            return dict(user) if user is not None else None
+
+    def exists(self, username):
+        self._refresh()
+        with self._lock:
+            return username in self._users
+
+    def add(self, username, record):
+        """新增用戶，用戶名稱已存在時回傳 False，寫入失敗時拋出 OSError"""
+        record = dict(record)
+        return self._commit(username, lambda user: None if user is not None else
+                            {"op": "add", "user": username, "data": record})
+
+    def update(self, username, **fields):
+        """更新用戶欄位，用戶不存在時回傳 False"""
+        return self._try_commit(username, lambda user: None if user is None else
+                            {"op": "set", "user": username, "fields": fields})
+
+    def raise_high_score(self, username, score):
+        """分數高於目前最高分時才更新，比較的對象是所有行程寫入後的最新分數"""
+        def build(user):
+            if user is None or not score > user.get("high_score", 0):
+                return None
+            return {"op": "set", "user": username, "fields": {"high_score": score}}
+        return self._try_commit(username, build)
+
+    def delete(self, username):
+        """刪除用戶，用戶不存在時回傳 False，寫入失敗時拋出 OSError"""
+        return self._commit(username, lambda user: None if user is None else
+                            {"op": "delete", "user": username})
+
+    def all(self):
+        """回傳所有用戶資料的副本"""
+        self._refresh()
+        with self._lock:
+            return {name: dict(data) for name, data in self._users.items()}
+
+    def replace_all(self, users):
+        """以新的資料整批取代目前內容（直接寫入快照並清空日誌）"""
+        with self.file_lock, self._lock:
+            self._users = {name: dict(data) for name, data in users.items()}
+            self._versions = {}
+            self._generation += 1
+            self._build_index()
+            self._write_snapshot(self._users)
+            self._reset_journal()
+
+    def top(self, limit=5):
+        """依最高分排序取前 limit 名（不含密碼）"""
+        self._refresh()
+        with self._lock:
+            return [(name, {"high_score": score}) for name, score in self._index.top(limit)]
+
+    def rank(self, username):
+        """用戶名次，用戶不存在時回傳 None"""
+        self._refresh()
+        with self._lock:
+            return self._index.rank(username)
+
+    def count_above(self, score):
+        """分數高於 score 的人數，分片儲存時用來加總全域名次"""
+        self._refresh()
+        with self._lock:
+            return self._index.count_above(score)
+
+    def flush(self):
+        """立即將已附加到日誌的記錄同步到磁碟。只在取走 dirty 旗標與計時器時持有鎖，
+        fsync 期間其他執行緒仍可讀取；這段期間新增的記錄會重新標記 dirty，留給下一次 flush"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            self._dirty = False
+        try:
+            with open(self.journal_path, "ab") as f:
+                os.fsync(f.fileno())
+                journal_size = os.fstat(f.fileno()).st_size
+        except OSError as e:
+            print(f"保存用戶資料時發生錯誤: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+        with self._lock:
+            if journal_size >= self.compact_threshold and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self.compact, daemon=True).start()
+        return True
+
+    def compact(self):
+        """將日誌合併回快照。整個過程持有檔案鎖，其他行程與執行緒的寫入會等待，
+        本行程的讀取只在複製資料時短暫等待"""
+        try:
+            with self.file_lock:
+                with self._lock:
+                    self._sync()
+                    users = {name: dict(data) for name, data in self._users.items()}
+                self._write_snapshot(users)
+                with self._lock:
+                    self._reset_journal()
+        except Exception as e:
+            print(f"合併用戶資料日誌時發生錯誤: {e}")
+        finally:
+            self._compacting = False
+
+    def reload(self):
+        """下次存取時重新讀取快照與整個日誌"""
+        with self._lock:
+            self.flush()
+            self._snapshot_state = None
+
+
+def create_store(backend=STORAGE_BACKEND, shards=SHARD_COUNT):
+    """依設定建立儲存後端"""
+    if shards > 1:
+        from sharded_store import create_sharded_store
+        return create_sharded_store(shards, backend)
+    if backend == "sqlite":
+        from sqlite_store import SQLiteUserStore
+        return SQLiteUserStore()
+    return UserStore()
+
+
+_store = create_store()
+atexit.register(lambda: _store.flush())
+
+def get_store():
+    return _store
+
+def set_store(store):
+    """切換儲存後端，會先將目前後端的資料寫回"""
+    global _store
+    _store.flush()
+    _store = store
+
 def load_users():
-    if not os.path.exists(USER_FILE):
-        with open(USER_FILE, "w", encoding='utf-8') as f:
-            json.dump({}, f)
-        return {}
-    
-    try:
-        with open(USER_FILE, "r", encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {}
+    return _store.all()
 
 def save_users(users):
+    """只寫入新增、內容不同或被移除的用戶，每個用戶各自更新，
+    不會覆蓋其他行程同時寫入的其他用戶"""
+    current = _store.all()
     try:
-        with open(USER_FILE, "w", encoding='utf-8') as f:
-            json.dump(users, f, indent=4, ensure_ascii=False)
-        return True
-    except Exception as e:
+        for username, data in users.items():
+            if username not in current:
+                _store.add(username, data)
+            elif data != current[username]:
+                _store.update(username, **data)
+        for username in current.keys() - users.keys():
+            _store.delete(username)
+    except OSError as e:
         print(f"保存用戶資料時發生錯誤: {e}")
         return False
+    return _store.flush()
 
 def validate_input(username, password):
     if not username or not password:
@@ -63,75 +450,77 @@ def register_user(username, password):
     if not is_valid:
         return False, error_msg
     
-    users = load_users()
-    
-    if username in users:
+    if _store.exists(username):
         return False, "用戶名稱已存在"
     
     # 創建新用戶
     hashed_pwd = hash_password(password)
-    users[username] = {
-        "password": hashed_pwd,
-        "high_score": 0
-    }
-    
-    if save_users(users):
+    try:
+        added = _store.add(username, {"password": hashed_pwd, "high_score": 0})
+    except OSError as e:
+        print(f"保存用戶資料時發生錯誤: {e}")
+        return False, "註冊失敗，請稍後再試"
+    if added:
         return True, "註冊成功"
     else:
-        return False, "註冊失敗，請稍後再試"
+        return False, "用戶名稱已存在"
 
 def login_user(username, password):
     """用戶登入"""
     if not username or not password:
         return False, "用戶名和密碼不能為空"
     
-    users = load_users()
+    user = _store.get(username)
     
-    if username not in users:
+    if user is None:
         return False, "用戶不存在"
     
-    stored_password = users[username]["password"]
+    stored_password = user["password"]
     
 
     if '$' not in stored_password:
         if stored_password == hashlib.sha256(password.encode()).hexdigest():
-            users[username]["password"] = hash_password(password)
-            save_users(users)
+            _store.update(username, password=hash_password(password))
             return True, "登入成功"
         else:
             return False, "密碼錯誤"
     else:
         if verify_password(password, stored_password):
+            if needs_rehash(stored_password):
+                _store.update(username, password=hash_password(password))
             return True, "登入成功"
         else:
             return False, "密碼錯誤"
 
 def update_high_score(username, score):
     """更新用戶最高分數"""
-    if not isinstance(score, (int, float)) or score < 0:
+    if not isinstance(score, (int, float)):
+        return False
+    # NaN 與無限大無法寫成標準 JSON，也會破壞排行榜的排序
+    if not math.isfinite(score) or score < 0:
         return False
     
-    users = load_users()
-    if username in users:
-        current_high_score = users[username].get("high_score", 0)
-        if score > current_high_score:
-            users[username]["high_score"] = score
-            return save_users(users)
-    
-    return False
+    return _store.raise_high_score(username, score)
 
 def get_high_score(username):
     """獲取用戶最高分數"""
-    users = load_users()
-    if username in users:
-        return users[username].get("high_score", 0)
+    user = _store.get(username)
+    if user is not None:
+        return user.get("high_score", 0)
     return 0
 
 def get_user_info(username):
     """獲取用戶信息（不包含密碼）"""
-    users = load_users()
-    if username in users:
-        user_info = users[username].copy()
+    user_info = _store.get(username)
+    if user_info is not None:
         user_info.pop("password", None)  # 移除密碼信息
         return user_info
     return None
+
+def get_top_players(limit=5):
+    """取得排行榜前 limit 名，回傳 [(username, {"high_score": ...}), ...]"""
+    return _store.top(limit)
+
+def get_rank(username):
+    """獲取用戶在排行榜上的名次，用戶不存在時回傳 None"""
+    return _store.rank(username)
@@ -0,0 +1,137 @@
+"""以 NumPy 同時模擬多個棋盤的貪食蛇環境，供訓練機器人與平衡測試使用。
+
+規則與 SnakeEngine 相同（撞牆、撞到自己含目前的尾巴都算死亡，吃到食物後
+下一次移動才變長，食物從空格中隨機挑選，棋盤滿了算通關），但所有棋盤的狀態
+都放在陣列裡一起更新，不需要每局一個 Python 物件。
+
+棋盤不存蛇身的位置串列，而是記錄每一格最後一次被蛇頭經過的步數：
+某格在第 t 步時仍是蛇身，若且唯若「經過的步數 > t - 蛇長」。
+因此移動只需寫入新的蛇頭，尾巴會自動過期，變長只要把蛇長加一。
+
+    env = BatchSnakeEnv(1024)
+    obs = env.reset()
+    obs, rewards, dones, info = env.step(actions)  # actions 為 DIRECTIONS 的索引，-1 表示不轉向
+"""
+import numpy as np
+
+from engine import GRID_WIDTH, GRID_HEIGHT, INITIAL_SPEED, SPEED_STEP, MAX_SPEED, FOOD_SCORE, DIRECTIONS
+
+# 方向索引與 engine.DIRECTIONS 相同（上、下、左、右），反方向為 index ^ 1
+DX = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+DY = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+START_DIRECTION = DIRECTIONS.index((1, 0))
+EMPTY = np.iinfo(np.int32).min // 2  # 從未被經過的格子
+
+# 觀察值每一列的欄位
+OBS_FIELDS = ("head_x", "head_y", "food_x", "food_y", "direction", "length")
+
+
+class BatchSnakeEnv:
+    """num_envs 個獨立棋盤，step() 一次讓每個棋盤各前進一格；結束的棋盤會自動重新開始"""
+
+    def __init__(self, num_envs, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.cell_count = width * height
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(num_envs)
+
+        self.board = np.full((num_envs, self.cell_count), EMPTY, dtype=np.int32)
+        self.head_x = np.zeros(num_envs, dtype=np.int32)
+        self.head_y = np.zeros(num_envs, dtype=np.int32)
+        self.direction = np.zeros(num_envs, dtype=np.int32)
+        self.length = np.zeros(num_envs, dtype=np.int32)
+        self.ticks = np.zeros(num_envs, dtype=np.int32)
+        self.grow = np.zeros(num_envs, dtype=bool)
+        self.score = np.zeros(num_envs, dtype=np.int32)
+        self.speed = np.zeros(num_envs, dtype=np.float64)
+        self.food = np.zeros(num_envs, dtype=np.int32)
+
+    def reset(self):
+        """重新開始所有棋盤，回傳觀察值"""
+        self._reset_envs(self.rows)
+        return self.observe()
+
+    def _reset_envs(self, envs):
+        x, y = self.width // 2, self.height // 2
+        self.board[envs] = EMPTY
+        self.board[envs, y * self.width + x] = 0
+        self.head_x[envs] = x
+        self.head_y[envs] = y
+        self.direction[envs] = START_DIRECTION
+        self.length[envs] = 1
+        self.ticks[envs] = 0
+        self.grow[envs] = False
+        self.score[envs] = 0
+        self.speed[envs] = INITIAL_SPEED
+        self._place_food(envs)
+
+    def _place_food(self, envs):
+        """在每個指定棋盤的空格中隨機放一個食物，回傳沒有空格（已通關）的遮罩"""
+        free = self.board[envs] <= (self.ticks[envs] - self.length[envs])[:, None]
+        weights = self.rng.random(free.shape)
+        weights[~free] = -1.0
+        self.food[envs] = weights.argmax(axis=1)
+        return ~free.any(axis=1)
+
+    def step(self, actions):
+        """所有棋盤前進一格，回傳 (觀察值, 獎勵, 是否結束, 資訊)。
+
+        獎勵為這一步得到的分數；結束的棋盤已經重新開始，結束時的分數、步數與
+        是否通關放在 info["final_score"]、info["final_ticks"]、info["won"]"""
+        actions = np.asarray(actions, dtype=np.int32)
+        # 與 change_direction 相同：不能直接回頭；-1 表示維持原方向
+        turn = (actions >= 0) & (actions != (self.direction ^ 1))
+        direction = np.where(turn, actions, self.direction)
+        self.direction = direction
+
+        x = self.head_x + DX[direction]
+        y = self.head_y + DY[direction]
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        cell = np.where(inside, y * self.width + x, 0)
+        # 撞到目前的尾巴也算撞到自己，所以用移動前的步數與蛇長判斷
+        dead = ~inside | (self.board[self.rows, cell] > self.ticks - self.length)
+        alive = ~dead
+
+        self.ticks += 1
+        self.length += self.grow & alive
+        self.grow[:] = False
+        moved = self.rows[alive]
+        self.board[moved, cell[alive]] = self.ticks[alive]
+        self.head_x = np.where(alive, x, self.head_x)
+        self.head_y = np.where(alive, y, self.head_y)
+
+        ate = alive & (cell == self.food)
+        rewards = ate * FOOD_SCORE
+        won = np.zeros(self.num_envs, dtype=bool)
+        if ate.any():
+            eaters = self.rows[ate]
+            self.grow[eaters] = True
+            self.score[eaters] += FOOD_SCORE
+            speed = self.speed[eaters]
+            self.speed[eaters] = np.where(speed < MAX_SPEED, speed + SPEED_STEP, speed)
+            won[eaters] = self._place_food(eaters)
+
+        dones = dead | won
+        info = {"won": won}
+        if dones.any():
+            finished = self.rows[dones]
+            info["final_score"] = np.where(dones, self.score, 0)
+            info["final_ticks"] = np.where(dones, self.ticks, 0)
+            self._reset_envs(finished)
+        return self.observe(), rewards, dones, info
+
+    def observe(self):
+        """每個棋盤一列：蛇頭座標、食物座標、方向與蛇長（欄位見 OBS_FIELDS）"""
+        return np.stack([self.head_x, self.head_y, self.food % self.width, self.food // self.width,
+                         self.direction, self.length], axis=1)
+
+    def boards(self, envs=None):
+        """完整棋盤 (數量, 高, 寬)：0 空格、1 蛇身、2 蛇頭、3 食物；成本較高，需要時再呼叫"""
+        envs = self.rows if envs is None else np.asarray(envs)
+        limit = (self.ticks[envs] - self.length[envs])[:, None]
+        grid = (self.board[envs] > limit).astype(np.uint8)
+        grid[np.arange(len(envs)), self.head_y[envs] * self.width + self.head_x[envs]] = 2
+        grid[np.arange(len(envs)), self.food[envs]] = 3
+        return grid.reshape(len(envs), self.height, self.width)
@@ -0,0 +1,54 @@
+"""量測重播檔的大小與驗證速度
+
+    python benchmarks/bench_replay.py
+    python benchmarks/bench_replay.py --games 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import SnakeEngine, StepResult, DIRECTIONS
+from replay import Replay, verify_replay
+
+
+def play_game(seed):
+    """以「朝食物走、偶爾亂轉」的簡單策略玩一局並記錄重播"""
+    engine = SnakeEngine(seed=seed)
+    rng = random.Random(seed)
+    replay = Replay.start(engine)
+    while True:
+        (head_x, head_y), (food_x, food_y) = engine.head, engine.food
+        if rng.random() < 0.1:
+            action = rng.choice(DIRECTIONS)
+        elif food_x != head_x:
+            action = (1, 0) if food_x > head_x else (-1, 0)
+        else:
+            action = (0, 1) if food_y > head_y else (0, -1)
+        result = engine.step(action)
+        replay.record(engine)
+        if result in (StepResult.DIED, StepResult.WON):
+            return replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重播檔大小與驗證速度")
+    parser.add_argument("--games", type=int, default=2000)
+    args = parser.parse_args()
+
+    blobs = [play_game(seed).to_bytes() for seed in range(args.games)]
+    ticks = sum(Replay.from_bytes(blob).ticks for blob in blobs)
+    size = sum(len(blob) for blob in blobs)
+    print(f"{args.games} 局，平均 {ticks / args.games:.0f} 步，平均 {size / args.games:.0f} 位元組")
+
+    start = time.perf_counter()
+    failed = sum(not verify_replay(Replay.from_bytes(blob))[0] for blob in blobs)
+    elapsed = time.perf_counter() - start
+    print(f"驗證: {args.games / elapsed:.0f} 局/秒，{ticks / elapsed / 1e6:.2f} 百萬步/秒，失敗 {failed} 局")
+
+
+if __name__ == "__main__":
+    main()
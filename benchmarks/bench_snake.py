@@ -0,0 +1,65 @@
+"""量測蛇身長度對每次移動成本的影響
+
+    python benchmarks/bench_snake.py
+    python benchmarks/bench_snake.py --lengths 10 1000 10000 --steps 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import SnakeEngine, RIGHT
+
+
+def make_engine(length, steps):
+    """建立一條橫躺在第 1 列、向右移動的蛇，前方留足 steps 格空間"""
+    engine = SnakeEngine(width=length + steps + 2, height=3, seed=0)
+    engine.set_body([(x, 1) for x in range(length - 1, -1, -1)], RIGHT)
+    engine.food = (0, 0)
+    return engine
+
+
+def list_move(body, direction):
+    """原本 Snake.move() 的作法：list 成員檢查加上 insert(0, ...)"""
+    head_x, head_y = body[0]
+    new_head = (head_x + direction[0], head_y + direction[1])
+    if new_head in body:
+        return False
+    body.insert(0, new_head)
+    body.pop()
+    return True
+
+
+def time_engine(length, steps):
+    engine = make_engine(length, steps)
+    start = time.perf_counter()
+    for _ in range(steps):
+        engine.step()
+    return (time.perf_counter() - start) / steps
+
+
+def time_list(length, steps):
+    body = [(x, 1) for x in range(length - 1, -1, -1)]
+    start = time.perf_counter()
+    for _ in range(steps):
+        list_move(body, RIGHT)
+    return (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="蛇身長度與每次移動成本")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 100, 1000, 5000, 20000])
+    parser.add_argument("--steps", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'長度':>8} {'deque+佔用表 (us)':>20} {'list (us)':>12}")
+    for length in args.lengths:
+        engine_cost = time_engine(length, args.steps)
+        list_cost = time_list(length, args.steps)
+        print(f"{length:>8} {engine_cost * 1e6:>20.2f} {list_cost * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
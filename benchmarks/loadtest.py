@@ -0,0 +1,108 @@
+"""server.py 的本機壓力測試，輸出每秒請求數與延遲百分位數
+
+    python benchmarks/loadtest.py                 # 在暫存目錄啟動一個伺服器並測試
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --clients 32
+
+送出的分數不附重播，測試已啟動的伺服器時需以 --allow-unverified 啟動，否則分數會被拒絕
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auth
+from client import ScoreClient
+from server import create_server
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_client(url, index, barrier, duration, latencies, errors, login_ratio):
+    client = ScoreClient(url, pool_size=1)
+    username = f"load_{index:04d}"
+    password = "loadtest"
+    client.register(username, password)
+    client.login(username, password)
+    rng = random.Random(index)
+    local = []
+    # 所有客戶端都完成註冊登入後才開始計時
+    barrier.wait()
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        start = time.perf_counter()
+        try:
+            if roll < login_ratio:
+                client.login(username, password)
+            elif roll < 0.5:
+                client.submit_score(rng.randrange(0, 5000, 10))
+            else:
+                client.leaderboard(10)
+        except Exception:
+            errors.append(1)
+            continue
+        local.append(time.perf_counter() - start)
+
+    latencies.extend(local)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="server.py 壓力測試")
+    parser.add_argument("--url", help="已啟動的伺服器位址，未指定時在暫存目錄啟動一個")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--login-ratio", type=float, default=0.02,
+                        help="登入請求的比例（登入需要計算密碼哈希，成本高）")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        os.chdir(tempfile.mkdtemp(prefix="snake-loadtest-"))
+        auth.set_store(auth.UserStore(flush_delay=0.2))
+        # 這裡測的是請求處理的吞吐量，分數不附重播，因此允許未驗證的分數
+        server = create_server(port=0, quiet=True, allow_unverified=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    latencies = []
+    errors = []
+    barrier = threading.Barrier(args.clients + 1)
+    threads = [threading.Thread(target=run_client,
+                                args=(url, i, barrier, args.duration, latencies, errors,
+                                      args.login_ratio))
+               for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"客戶端數: {args.clients}, 測試時間: {elapsed:.1f}s")
+    print(f"請求數: {len(latencies)}, 錯誤數: {len(errors)}")
+    print(f"每秒請求數: {len(latencies) / elapsed:.0f}")
+    print(f"延遲 p50: {percentile(latencies, 50) * 1000:.2f} ms, "
+          f"p99: {percentile(latencies, 99) * 1000:.2f} ms")
+
+    if server is not None:
+        server.shutdown()
+        auth.get_store().flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""多個行程同時註冊與更新分數，確認 users.json 沒有遺失任何修改
+
+    python benchmarks/stress_users.py
+    python benchmarks/stress_users.py --processes 48 --users 30 --scores 200
+    python benchmarks/stress_users.py --shards 8   # 分片儲存，各分片各自上鎖
+
+每個行程註冊自己的用戶，也和其他行程搶著註冊同一批共用名稱，並對共用用戶送出
+隨機分數。結束後用新的行程讀取檔案檢查：
+- 每個回報成功的註冊都存在，且每個共用名稱只有一個行程註冊成功
+- 每個用戶的最高分等於所有行程送出過的最高分
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SHARED_USERS = 10
+
+
+def open_store(shards, **options):
+    import auth
+    if shards <= 1:
+        return auth.UserStore(**options)
+    from sharded_store import ShardedUserStore, shard_path
+    return ShardedUserStore(auth.UserStore(shard_path(auth.USER_FILE, i), **options)
+                            for i in range(shards))
+
+
+def worker(args):
+    index, directory, users, scores, compact_threshold, shards = args
+    os.chdir(directory)
+    # 降低哈希成本，讓壓力集中在檔案存取
+    os.environ["SNAKE_HASH_SCHEME"] = "pbkdf2_sha256"
+    import auth
+    auth.PBKDF2_ITERATIONS = 1000
+    auth.set_store(open_store(shards, flush_delay=0.05, compact_threshold=compact_threshold))
+
+    rng = random.Random(index)
+    registered = []
+    best = {}
+    names = [f"p{index}-{i}" for i in range(users)] + [f"shared-{i}" for i in range(SHARED_USERS)]
+    rng.shuffle(names)
+    for name in names:
+        if auth.register_user(name, "password")[0]:
+            registered.append(name)
+    for _ in range(scores):
+        name = f"shared-{rng.randrange(SHARED_USERS)}" if rng.random() < 0.7 else rng.choice(names)
+        score = rng.randrange(100000)
+        auth.update_high_score(name, score)
+        best[name] = max(best.get(name, 0), score)
+    auth.get_store().flush()
+    return registered, best
+
+
+def check(directory, results, shards):
+    os.chdir(directory)
+    users = open_store(shards).all()
+    errors = []
+
+    owners = {}
+    for registered, _ in results:
+        for name in registered:
+            owners[name] = owners.get(name, 0) + 1
+            if name not in users:
+                errors.append(f"註冊成功卻不存在: {name}")
+    for i in range(SHARED_USERS):
+        if owners.get(f"shared-{i}", 0) != 1:
+            errors.append(f"shared-{i} 被註冊了 {owners.get(f'shared-{i}', 0)} 次")
+
+    best = {}
+    for _, scores in results:
+        for name, score in scores.items():
+            best[name] = max(best.get(name, 0), score)
+    for name, score in best.items():
+        actual = users.get(name, {}).get("high_score")
+        if actual != score:
+            errors.append(f"{name} 最高分應為 {score}，實際為 {actual}")
+    return len(users), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="users.json 多行程壓力測試")
+    parser.add_argument("--processes", type=int, default=32)
+    parser.add_argument("--users", type=int, default=20, help="每個行程自己註冊的用戶數")
+    parser.add_argument("--scores", type=int, default=100, help="每個行程送出的分數數量")
+    parser.add_argument("--compact-threshold", type=int, default=16 * 1024,
+                        help="日誌合併門檻（位元組），設小一點可以同時測到合併")
+    parser.add_argument("--shards", type=int, default=1, help="分片數量，1 表示單一 users.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        tasks = [(i, directory, args.users, args.scores, args.compact_threshold, args.shards)
+                 for i in range(args.processes)]
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.map(worker, tasks)
+        elapsed = time.perf_counter() - start
+
+        count, errors = check(directory, results, args.shards)
+        operations = args.processes * (args.users + SHARED_USERS + args.scores)
+        print(f"{args.processes} 個行程，{operations} 次操作，{elapsed:.2f} 秒，最後共有 {count} 個用戶")
+        for error in errors[:20]:
+            print(error)
+        print("失敗" if errors else "通過：沒有遺失任何註冊或分數")
+        sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""效能基準測試組：遊戲引擎、密碼哈希、用戶資料存取、排行榜與無視窗繪製（含大棋盤）
+
+    python benchmarks/suite.py                               # 全部執行，結果寫入 benchmark_results.json
+    python benchmarks/suite.py --quick --only engine storage  # 較小的規模，只跑部分項目
+    python benchmarks/suite.py --output benchmarks/baseline.json
+    python benchmarks/suite.py --compare benchmarks/baseline.json --threshold 0.15
+
+每個項目執行數輪，記錄每次操作耗時（微秒）的中位數與最小值。--compare 以最小值
+（受其他程式干擾最少）與基準檔比較，變慢超過門檻的項目標示為退步，並以結束碼 1 結束。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GROUPS = ("engine", "hash", "storage", "render")
+
+
+def measure(fn, number, repeat=5, setup=None):
+    """執行 repeat 輪、每輪呼叫 fn number 次，回傳每次呼叫耗時（微秒）的中位數與最小值"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number * 1e6)
+    return {"median": statistics.median(times), "min": min(times), "unit": "us"}
+
+
+def bench_engine(quick):
+    from engine import SnakeEngine, RIGHT
+
+    results = {}
+    number, repeat = 2000, 5
+    for length in (10, 100, 1000) if quick else (10, 100, 1000, 10000):
+        # 橫躺在第 1 列向右移動，前方留足所有輪次需要的空間
+        engine = SnakeEngine(width=length + number * repeat + 2, height=3, seed=0)
+        engine.set_body([(x, 1) for x in range(length - 1, -1, -1)], RIGHT)
+        engine.food = (0, 0)
+        results[f"engine.move[len={length}]"] = measure(engine.step, number, repeat)
+
+    for width, height in ((40, 25), (200, 200)):
+        cells = width * height
+        for fill in (10, 50, 90, 99):
+            engine = SnakeEngine(width, height, seed=0)
+            order = list(range(cells))
+            random.Random(fill).shuffle(order)
+            occupied = order[:cells * fill // 100]
+            engine.set_body([(cell % width, cell // width) for cell in occupied], RIGHT)
+            name = f"engine.place_food[{width}x{height},fill={fill}%]"
+            results[name] = measure(engine.place_food, 2000, 5)
+    return results
+
+
+def bench_hash(quick):
+    import auth
+
+    results = {}
+    for scheme in ("scrypt", "pbkdf2_sha256"):
+        hashed = auth.hash_password("benchmark", scheme=scheme)
+        repeat = 3 if quick else 5
+        results[f"auth.hash_password[{scheme}]"] = measure(
+            lambda: auth.hash_password("benchmark", scheme=scheme), 1, repeat)
+        results[f"auth.verify_password[{scheme}]"] = measure(
+            lambda: auth.verify_password("benchmark", hashed), 1, repeat)
+    return results
+
+
+def make_users(count):
+    """產生 count 個用戶，密碼欄位長度與 PBKDF2 哈希相同"""
+    rng = random.Random(count)
+    password = "pbkdf2_sha256$200000$" + "0" * 32 + "$" + "0" * 64
+    return {f"user{i:07d}": {"password": password, "high_score": rng.randrange(0, 100000, 10)}
+            for i in range(count)}
+
+
+def bench_storage(quick):
+    import auth
+
+    results = {}
+    previous_store = auth.get_store()
+    for count in (10, 10_000) if quick else (10, 10_000, 1_000_000):
+        big = count >= 1_000_000
+        users = make_users(count)
+        names = list(users)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "users.json")
+            writer = auth.UserStore(path, flush_delay=3600)
+            results[f"storage.replace_all[{count}]"] = measure(
+                lambda: writer.replace_all(users), 1, 3 if big else 5)
+
+            results[f"storage.load_users[{count}]"] = measure(
+                lambda: auth.UserStore(path, flush_delay=3600).all(), 1, 3 if big else 5)
+
+            store = auth.UserStore(path, flush_delay=3600)
+            auth.set_store(store)
+            scores = iter(range(10 ** 6, 10 ** 9))
+            rng = random.Random(0)
+            results[f"storage.raise_high_score[{count}]"] = measure(
+                lambda: store.raise_high_score(rng.choice(names), next(scores)), 200, 5)
+
+            def save_one_change():
+                current = auth.load_users()
+                current[rng.choice(names)]["high_score"] = next(scores)
+                auth.save_users(current)
+            results[f"storage.save_users[{count}]"] = measure(save_one_change, 1, 3 if big else 5)
+
+            # Leaderboard.update_leaderboard 在背景執行的就是 get_top_players
+            results[f"leaderboard.update[{count}]"] = measure(
+                lambda: auth.get_top_players(5), 200, 5)
+            results[f"leaderboard.rank[{count}]"] = measure(
+                lambda: auth.get_rank(rng.choice(names)), 200, 5)
+            store.flush()
+        auth.set_store(previous_store)
+    return results
+
+
+def bench_render(quick):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    try:
+        import main
+    except ImportError as e:
+        print(f"略過 render: {e}")
+        return {}
+    from bots import HamiltonianPolicy
+    from engine import DOWN
+
+    main.init_display()
+    game = main.Game()
+    game.current_user = "benchmark"
+    results = {}
+    number = 100 if quick else 300
+
+    def intro_frame():
+        game.intro_animation.update()
+        game.intro_animation.draw(main.screen)
+    results["render.intro"] = measure(intro_frame, number, 3)
+
+    game.state = main.GameState.LOGIN
+    results["render.login"] = measure(game.draw_login_screen, number, 3)
+
+    for length in (10, 200, 800):
+        engine = game.engine
+        policy = HamiltonianPolicy(engine.width, engine.height)
+        cycle = policy.build_cycle(engine.width, engine.height)
+        body = [(cell % engine.width, cell // engine.width) for cell in reversed(cycle[:length])]
+
+        def reset_snake():
+            game.start_game()
+            (head_x, head_y), (next_x, next_y) = body[0], body[1]
+            engine.set_body(body, (head_x - next_x, head_y - next_y))
+            engine.place_food()
+            game.draw_game_screen()
+
+        def full_frame():
+            engine.step(policy(engine))
+            game.draw_game_screen()
+
+        def dirty_frame():
+            engine.step(policy(engine))
+            game.draw_game_screen_dirty()
+
+        results[f"render.game_full[len={length}]"] = measure(full_frame, number, 3, reset_snake)
+        results[f"render.game_dirty[len={length}]"] = measure(dirty_frame, number, 3, reset_snake)
+
+    # 大棋盤：蛇身以蛇行排滿最上面幾列，蛇頭往下走，鏡頭每步都要捲動
+    board_size = (main.GRID_WIDTH, main.GRID_HEIGHT)
+    for side, length in ((400, 10_000),) if quick else ((400, 10_000), (2000, 100_000), (2000, 1_000_000)):
+        main.GRID_WIDTH = main.GRID_HEIGHT = side
+        game.start_game()
+        engine = game.engine
+        body = [(x if y % 2 == 0 else side - 1 - x, y) for y in range(length // side + 1) for x in range(side)]
+        body = body[length - 1::-1]
+
+        def reset_big():
+            game.start_game()
+            engine.set_body(body, DOWN)
+            engine.place_food()
+            game.camera.center()
+            game.draw_game_screen()
+
+        def full_big():
+            engine.step(DOWN)
+            game.draw_game_screen()
+
+        def dirty_big():
+            engine.step(DOWN)
+            game.draw_game_screen_dirty()
+
+        name = f"{side}x{side},len={length}"
+        results[f"render.game_full[{name}]"] = measure(full_big, number, 3, reset_big)
+        results[f"render.game_dirty[{name}]"] = measure(dirty_big, number, 3, reset_big)
+    main.GRID_WIDTH, main.GRID_HEIGHT = board_size
+
+    game.state = main.GameState.GAME_OVER
+    results["render.game_over"] = measure(game.draw_game_over_screen, number, 3)
+    game.jobs.shutdown()
+    return results
+
+
+BENCHMARKS = {
+    "engine": bench_engine,
+    "hash": bench_hash,
+    "storage": bench_storage,
+    "render": bench_render,
+}
+
+
+def compare(results, baseline, threshold):
+    """回傳退步的項目數"""
+    regressions = 0
+    print(f"\n{'項目':<44} {'基準 (us)':>12} {'本次 (us)':>12} {'比例':>7}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<44} {'-':>12} {result['min']:>12.2f} {'新項目':>7}")
+            continue
+        ratio = result["min"] / base["min"] if base["min"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  退步"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = "  進步"
+        print(f"{name:<44} {base['min']:>12.2f} {result['min']:>12.2f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="貪食蛇效能基準測試")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--quick", action="store_true", help="縮小規模（不含 1M 用戶與 10k 長度）")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="與基準結果比較")
+    parser.add_argument("--threshold", type=float, default=0.15, help="最小值變慢超過此比例視為退步")
+    args = parser.parse_args()
+
+    results = {}
+    for group in args.only:
+        start = time.perf_counter()
+        group_results = BENCHMARKS[group](args.quick)
+        for name, result in group_results.items():
+            print(f"{name:<44} {result['median']:>12.2f} us  (最小 {result['min']:.2f})")
+        print(f"-- {group} 完成，{time.perf_counter() - start:.1f} 秒")
+        results.update(group_results)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"結果已寫入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n{regressions} 個項目退步" if regressions else "\n沒有退步的項目")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
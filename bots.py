@@ -0,0 +1,151 @@
+"""自動玩貪食蛇的策略，每個策略依 SnakeEngine 目前的狀態決定下一步的方向。
+
+    policy = create_policy("bfs", engine.width, engine.height)
+    engine.step(policy(engine))
+"""
+from collections import deque
+
+from engine import DIRECTIONS
+
+
+def _neighbors(engine, x, y):
+    """(方向, 座標) 中不會撞牆也不會撞到蛇身的鄰格"""
+    for direction in DIRECTIONS:
+        nx, ny = x + direction[0], y + direction[1]
+        if (0 <= nx < engine.width and 0 <= ny < engine.height and
+                not engine.occupied[ny * engine.width + nx]):
+            yield direction, nx, ny
+
+
+def _safe_moves(engine):
+    reverse = (-engine.direction[0], -engine.direction[1])
+    head_x, head_y = engine.head
+    return [(d, x, y) for d, x, y in _neighbors(engine, head_x, head_y) if d != reverse]
+
+
+def _reachable(engine, start):
+    """從 start 出發可以走到的空格數"""
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for _, nx, ny in _neighbors(engine, x, y):
+            if (nx, ny) not in seen:
+                seen.add((nx, ny))
+                queue.append((nx, ny))
+    return len(seen)
+
+
+class GreedyPolicy:
+    """往食物的方向走，只避開下一步就會死的格子"""
+
+    def __init__(self, width, height):
+        pass
+
+    def __call__(self, engine):
+        moves = _safe_moves(engine)
+        if not moves:
+            return engine.direction
+        food_x, food_y = engine.food
+        return min(moves, key=lambda m: abs(m[1] - food_x) + abs(m[2] - food_y))[0]
+
+
+class BFSPolicy:
+    """沿最短路徑走向食物；找不到路時往可活動空間最大的方向走。
+
+    蛇身只會在走過的路徑上出現，因此路徑在食物換位置之前都不會被擋住，
+    不必每一步重新搜尋"""
+
+    def __init__(self, width, height):
+        self.path = deque()
+        self.target = None
+
+    def __call__(self, engine):
+        if self.target != engine.food or not self.path or engine.is_occupied(self.path[0][1]):
+            self.target = engine.food
+            self.path = self.find_path(engine)
+        if self.path:
+            return self.path.popleft()[0]
+        moves = _safe_moves(engine)
+        if not moves:
+            return engine.direction
+        return max(moves, key=lambda m: _reachable(engine, (m[1], m[2])))[0]
+
+    @staticmethod
+    def find_path(engine):
+        start = engine.head
+        reverse = (-engine.direction[0], -engine.direction[1])
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            if cell == engine.food:
+                path = deque()
+                while parents[cell] is not None:
+                    previous, direction = parents[cell]
+                    path.appendleft((direction, cell))
+                    cell = previous
+                return path
+            for direction, nx, ny in _neighbors(engine, *cell):
+                if cell == start and direction == reverse:
+                    continue
+                if (nx, ny) not in parents:
+                    parents[(nx, ny)] = (cell, direction)
+                    queue.append((nx, ny))
+        return deque()
+
+
+class HamiltonianPolicy:
+    """沿著走遍每一格的固定迴圈前進，永遠不會撞到自己，最後一定會填滿棋盤；
+    需要寬或高至少一邊是偶數"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        cycle = self.build_cycle(width, height)
+        self.next_cell = [0] * (width * height)
+        self.previous_cell = [0] * (width * height)
+        for i, cell in enumerate(cycle):
+            following = cycle[(i + 1) % len(cycle)]
+            self.next_cell[cell] = following
+            self.previous_cell[following] = cell
+
+    @staticmethod
+    def build_cycle(width, height):
+        """回傳格子編號（y * width + x）的迴圈順序"""
+        if height % 2 == 0 and width >= 2:
+            # 第 0 欄留作回程，其餘各列來回蛇行
+            cells = []
+            for y in range(height):
+                xs = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+                cells.extend(y * width + x for x in xs)
+            cells.extend(y * width for y in range(height - 1, -1, -1))
+            return cells
+        if width % 2 == 0 and height >= 2:
+            # 轉置後套用同樣的作法
+            return [(cell % height) * width + cell // height
+                    for cell in HamiltonianPolicy.build_cycle(height, width)]
+        raise ValueError("棋盤寬高都是奇數時不存在走遍每一格的迴圈")
+
+    def __call__(self, engine):
+        head_x, head_y = engine.head
+        head = head_y * self.width + head_x
+        target = self.next_cell[head]
+        direction = (target % self.width - head_x, target // self.width - head_y)
+        if direction == (-engine.direction[0], -engine.direction[1]):
+            # 剛開始時迴圈的下一格可能在正後方，改成反向繞行
+            self.next_cell, self.previous_cell = self.previous_cell, self.next_cell
+            target = self.next_cell[head]
+            direction = (target % self.width - head_x, target // self.width - head_y)
+        return direction
+
+
+POLICIES = {
+    "greedy": GreedyPolicy,
+    "bfs": BFSPolicy,
+    "hamiltonian": HamiltonianPolicy,
+}
+
+
+def create_policy(name, width, height):
+    return POLICIES[name](width, height)
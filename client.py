@@ -0,0 +1,83 @@
+import http.client
+import json
+import queue
+from urllib.parse import urlparse
+
+
+class ScoreClient:
+    """server.py 的客戶端，保留 keep-alive 連線重複使用，可同時在多個執行緒中呼叫"""
+
+    def __init__(self, base_url, pool_size=2, timeout=10):
+        url = urlparse(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self.token = None
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method, path, payload=None):
+        """送出請求並回傳 (狀態碼, JSON 內容)；連線被伺服器關閉時會重試一次"""
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = json.loads(response.read() or b"{}")
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                if attempt == 1:
+                    raise
+                continue
+            self._release(conn)
+            return response.status, data
+
+    def register(self, username, password):
+        _, data = self.request("POST", "/register", {"username": username, "password": password})
+        return data.get("success", False), data.get("message", "")
+
+    def login(self, username, password):
+        """回傳 (是否成功, 訊息, 用戶資料)"""
+        _, data = self.request("POST", "/login", {"username": username, "password": password})
+        if data.get("success"):
+            self.token = data["token"]
+        return data.get("success", False), data.get("message", ""), data.get("user")
+
+    def submit_score(self, score, replay=None):
+        """回傳 (是否刷新最高分, 名次)；replay 為 replay.Replay，伺服器會重新模擬驗證分數"""
+        payload = {"score": score}
+        if replay is not None:
+            payload["replay"] = replay.to_text()
+        _, data = self.request("POST", "/score", payload)
+        return data.get("updated", False), data.get("rank")
+
+    def leaderboard(self, limit=5):
+        _, data = self.request("GET", f"/leaderboard?limit={limit}")
+        return [(p["username"], {"high_score": p["high_score"]}) for p in data.get("players", [])]
+
+    def rank(self):
+        _, data = self.request("GET", "/me")
+        return data.get("rank")
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,173 @@
+"""貪食蛇的遊戲規則，不依賴 pygame，可在沒有視窗的環境下以任意速度模擬"""
+import random
+from array import array
+from collections import deque
+from functools import lru_cache
+
+GRID_WIDTH = 40
+GRID_HEIGHT = 25
+
+INITIAL_SPEED = 10
+MAX_SPEED = 20
+SPEED_STEP = 0.5
+FOOD_SCORE = 10
+
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+
+_INDEX_CHUNK = 65536  # 分段建立索引，每段之間其他執行緒可以取得 GIL
+
+
+@lru_cache(maxsize=2)
+def _cell_indices(cell_count):
+    """0..cell_count-1 的 array。從 range 建立大棋盤要數百毫秒，
+    重設同樣大小的棋盤時改為複製這份，只需要幾毫秒。
+    分段建立，在背景執行緒建立大棋盤時不會讓主執行緒停頓"""
+    indices = array('i')
+    for start in range(0, cell_count, _INDEX_CHUNK):
+        indices.extend(range(start, min(start + _INDEX_CHUNK, cell_count)))
+    return indices
+
+
+class StepResult:
+    MOVED = "moved"
+    ATE = "ate"
+    DIED = "died"
+    WON = "won"  # 蛇佔滿整個棋盤，沒有位置可以放食物
+
+
+class SnakeEngine:
+    """單局遊戲狀態，每次 step() 前進一格；食物位置由可指定種子的亂數產生，
+    相同的種子與操作序列一定得到相同的結果。
+
+    蛇身以 deque 儲存（頭在左端），另外用 occupied（每格一個位元組）記錄
+    哪些格子被蛇身佔用，移動、碰撞檢查與變長都是 O(1)。
+    空格索引 free_cells 存放所有空格的編號（y * width + x），free_pos 記錄每格在
+    free_cells 中的位置（-1 表示被佔用），以「與最後一個交換後刪除」維護，
+    因此放置食物只需從 free_cells 隨機取一個，不會因為棋盤快滿而一直重抽"""
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None,
+                 initial_speed=INITIAL_SPEED, speed_step=SPEED_STEP, max_speed=MAX_SPEED):
+        self.width = width
+        self.height = height
+        # 速度變化規則：起始速度，每吃一個食物加 speed_step，最高 max_speed
+        self.initial_speed = initial_speed
+        self.speed_step = speed_step
+        self.max_speed = max_speed
+        self.rng = random.Random()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng.seed(self.seed)
+        cell_count = self.width * self.height
+        self.occupied = bytearray(cell_count)
+        self.free_cells = _cell_indices(cell_count)[:]
+        self.free_pos = _cell_indices(cell_count)[:]
+        self.body = deque()
+        self.set_body([(self.width // 2, self.height // 2)], RIGHT)
+        self.grow = False
+        self.score = 0
+        self.speed = self.initial_speed
+        self.ticks = 0
+        self.alive = True
+        self.won = False
+        self.food = None
+        self.place_food()
+
+    def set_body(self, cells, direction):
+        """直接指定蛇身（頭在最前面）與方向，供測試與效能量測使用"""
+        for x, y in self.body:
+            self._release(y * self.width + x)
+        self.body = deque(cells)
+        for x, y in self.body:
+            self._occupy(y * self.width + x)
+        self.direction = direction
+
+    def _occupy(self, cell):
+        self.occupied[cell] = 1
+        index = self.free_pos[cell]
+        last = self.free_cells.pop()
+        if last != cell:
+            self.free_cells[index] = last
+            self.free_pos[last] = index
+        self.free_pos[cell] = -1
+
+    def _release(self, cell):
+        self.occupied[cell] = 0
+        self.free_pos[cell] = len(self.free_cells)
+        self.free_cells.append(cell)
+
+    def is_occupied(self, position):
+        return self.occupied[position[1] * self.width + position[0]] == 1
+
+    @property
+    def head(self):
+        return self.body[0]
+
+    def change_direction(self, new_direction):
+        if (new_direction[0] * -1, new_direction[1] * -1) != self.direction:
+            self.direction = new_direction
+
+    def place_food(self):
+        """從空格中隨機選一格放食物，沒有空格時回傳 False"""
+        if not self.free_cells:
+            self.food = None
+            return False
+        cell = self.free_cells[self.rng.randrange(len(self.free_cells))]
+        self.food = (cell % self.width, cell // self.width)
+        return True
+
+    def step(self, action=None):
+        """前進一格，action 為新的方向（None 表示維持原方向），回傳 StepResult"""
+        if not self.alive:
+            return StepResult.WON if self.won else StepResult.DIED
+        if action is not None:
+            self.change_direction(action)
+        self.ticks += 1
+
+        head_x, head_y = self.body[0]
+        x = head_x + self.direction[0]
+        y = head_y + self.direction[1]
+
+        # 與原本規則相同：撞到目前的尾巴也算撞到自己
+        if (x < 0 or x >= self.width or y < 0 or y >= self.height or
+                self.occupied[y * self.width + x]):
+            self.alive = False
+            return StepResult.DIED
+
+        new_head = (x, y)
+        self.body.appendleft(new_head)
+        self._occupy(y * self.width + x)
+        if not self.grow:
+            tail_x, tail_y = self.body.pop()
+            self._release(tail_y * self.width + tail_x)
+        else:
+            self.grow = False
+
+        if new_head == self.food:
+            # 和原本一樣，吃到食物後下一次移動才會變長
+            self.grow = True
+            self.score += FOOD_SCORE
+            if self.speed < self.max_speed:
+                self.speed += self.speed_step
+            if not self.place_food():
+                self.alive = False
+                self.won = True
+                return StepResult.WON
+            return StepResult.ATE
+        return StepResult.MOVED
+
+    def run(self, actions):
+        """依序執行一串操作直到遊戲結束，回傳實際執行的步數"""
+        steps = 0
+        for action in actions:
+            if not self.alive:
+                break
+            steps += 1
+            self.step(action)
+        return steps
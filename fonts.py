@@ -0,0 +1,135 @@
+"""中文字體的尋找與延遲載入。
+
+找到的字體路徑會寫入快取檔，下次啟動直接使用，不必再逐一檢查路徑或呼叫 fontconfig；
+找不到時不寫入快取，之後安裝了中文字體仍然會被找到"""
+import json
+import os
+import shutil
+import subprocess
+
+import pygame
+
+FONT_CACHE_FILE = os.environ.get(
+    "SNAKE_FONT_CACHE", os.path.join(os.path.expanduser("~"), ".snakegame_font.json"))
+
+CHINESE_FONTS = [
+    # Windows
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+    "C:/Windows/Fonts/simsun.ttc",
+    # macOS
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/STHeiti Light.ttc",
+    # Linux
+    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+]
+
+# 各種字體大小：(中文字體大小, 默認字體大小)
+FONT_SIZES = {
+    "big_title": (36, 40),
+    "title": (24, 28),
+    "normal": (20, 24),
+    "small": (16, 20),
+}
+
+
+def query_fontconfig():
+    """透過 fc-list 列出涵蓋中文的字體檔。fc-match 一定會回傳某個字體（即使不含中文），
+    所以改用只列出符合條件字體的 fc-list"""
+    if shutil.which("fc-list") is None:
+        return []
+    try:
+        result = subprocess.run(["fc-list", ":lang=zh", "-f", "%{file}\n"],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return []
+    if result.returncode != 0:
+        return []
+    return sorted(path for path in set(result.stdout.splitlines()) if path)
+
+
+def load_cached_path():
+    """讀取快取的字體路徑，沒有快取或檔案已不存在時回傳 None"""
+    try:
+        with open(FONT_CACHE_FILE, "r", encoding='utf-8') as f:
+            path = json.load(f).get("path")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return path if path and os.path.exists(path) else None
+
+
+def save_cached_path(path):
+    try:
+        with open(FONT_CACHE_FILE, "w", encoding='utf-8') as f:
+            json.dump({"path": path}, f)
+    except OSError as e:
+        print(f"無法寫入字體快取: {e}")
+
+
+def candidate_fonts():
+    """先列出已知的中文字體路徑，都不能用時才呼叫 fontconfig"""
+    yield from CHINESE_FONTS
+    yield from query_fontconfig()
+
+
+def find_chinese_font():
+    """回傳中文字體路徑，找不到時回傳 None（使用默認字體）"""
+    cached = load_cached_path()
+    if cached is not None:
+        return cached
+
+    for font_path in candidate_fonts():
+        if os.path.exists(font_path):
+            try:
+                pygame.font.Font(font_path, FONT_SIZES["normal"][0])
+            except (OSError, pygame.error):
+                continue
+            save_cached_path(font_path)
+            return font_path
+
+    print("警告: 未找到中文字體，使用默認字體")
+    return None
+
+
+class FontSet:
+    """第一次使用某個大小的字體時才載入"""
+
+    def __init__(self):
+        self._path = None
+        self._resolved = False
+        self._fonts = {}
+
+    @property
+    def path(self):
+        if not self._resolved:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._path = find_chinese_font()
+            self._resolved = True
+        return self._path
+
+    def get(self, name):
+        font = self._fonts.get(name)
+        if font is None:
+            chinese_size, default_size = FONT_SIZES[name]
+            path = self.path
+            font = pygame.font.Font(path, chinese_size if path else default_size)
+            self._fonts[name] = font
+        return font
+
+    @property
+    def big_title(self):
+        return self.get("big_title")
+
+    @property
+    def title(self):
+        return self.get("title")
+
+    @property
+    def normal(self):
+        return self.get("normal")
+
+    @property
+    def small(self):
+        return self.get("small")
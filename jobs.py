@@ -0,0 +1,47 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobRunner:
+    """背景工作佇列：耗時的工作（檔案讀寫、密碼哈希）交給執行緒池，
+    完成後的回呼放進佇列，由主迴圈每幀呼叫 poll() 在主執行緒上執行"""
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="game-job")
+        self._completed = queue.SimpleQueue()
+        self.pending = 0
+
+    def submit(self, fn, *args, callback=None, on_error=None):
+        """在背景執行 fn(*args)，完成後以結果呼叫 callback"""
+        future = self._executor.submit(fn, *args)
+        return self.watch(future, callback, on_error)
+
+    def watch(self, future, callback=None, on_error=None):
+        """監看已存在的 Future，完成後在主執行緒呼叫 callback"""
+        self.pending += 1
+        future.add_done_callback(lambda f: self._completed.put((f, callback, on_error)))
+        return future
+
+    def poll(self):
+        """執行所有已完成工作的回呼，不會阻塞"""
+        while True:
+            try:
+                future, callback, on_error = self._completed.get_nowait()
+            except queue.Empty:
+                return
+            self.pending -= 1
+            error = future.exception()
+            if error is not None:
+                print(f"背景工作發生錯誤: {error}")
+                if on_error is not None:
+                    on_error(error)
+            elif callback is not None:
+                callback(future.result())
+
+    @property
+    def busy(self):
+        return self.pending > 0
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self.poll()
@@ -1,16 +1,25 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import pygame
 import sys
 import os
-import random
-import math
-from auth import register_user, login_user, get_user_info, update_high_score, load_users
-
-# 初始化 Pygame
-pygame.init()
+import json
+import argparse
+import subprocess
+from collections import OrderedDict, deque
+from itertools import islice
+from auth import register_user, login_user, get_user_info, update_high_score, get_top_players, get_rank
+from jobs import JobRunner
+from client import ScoreClient
+from particles import IntroParticles
+from fonts import FontSet, FONT_CACHE_FILE
+from engine import SnakeEngine, StepResult, UP, DOWN, LEFT, RIGHT, INITIAL_SPEED, SPEED_STEP, MAX_SPEED
+from replay import Replay, ReplayError, check_rules, verify_replay, save_replay, MAX_CELLS
+from profiler import profiler, OVERLAY_RECT
 
 WINDOW_SIZE = (800, 600)
-screen = pygame.display.set_mode(WINDOW_SIZE)
-pygame.display.set_caption("貪食蛇遊戲系統")
+screen = None  # 由 init_display() 建立，匯入本模組時不會開啟視窗
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -27,44 +36,112 @@ PURPLE = (147, 112, 219)
 CYAN = (0, 255, 255)
 
 GRID_SIZE = 20
-GRID_WIDTH = WINDOW_SIZE[0] // GRID_SIZE
-GRID_HEIGHT = (WINDOW_SIZE[1] - 100) // GRID_SIZE
-
-# 中文字體設定
-def load_chinese_font():
-    """載入中文字體"""
-    chinese_fonts = [
-        # Windows
-        "C:/Windows/Fonts/msyh.ttc",      
-        "C:/Windows/Fonts/simhei.ttf",    
-        "C:/Windows/Fonts/simsun.ttc", 
-        # macOS
-        "/System/Library/Fonts/PingFang.ttc",
-        "/System/Library/Fonts/STHeiti Light.ttc",
-        # Linux
-        "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
-        "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
-    ]
-    
-    for font_path in chinese_fonts:
-        if os.path.exists(font_path):
-            try:
-                return (pygame.font.Font(font_path, 36),  
-                       pygame.font.Font(font_path, 24),  
-                       pygame.font.Font(font_path, 20),  
-                       pygame.font.Font(font_path, 16))
-            except:
-                continue
+BOARD_RECT = pygame.Rect(0, 100, WINDOW_SIZE[0], WINDOW_SIZE[1] - 100)  # 視窗中顯示棋盤的區域
+VIEW_WIDTH = BOARD_RECT.width // GRID_SIZE
+VIEW_HEIGHT = BOARD_RECT.height // GRID_SIZE
+
+def board_size_setting():
+    """讀取 SNAKE_BOARD_WIDTH / SNAKE_BOARD_HEIGHT。每邊須在 1..65535（重播檔頭的範圍）之間、
+    總格數不超過 MAX_CELLS，否則改用預設大小"""
+    try:
+        width = int(os.environ.get("SNAKE_BOARD_WIDTH", VIEW_WIDTH))
+        height = int(os.environ.get("SNAKE_BOARD_HEIGHT", VIEW_HEIGHT))
+    except ValueError:
+        print("棋盤大小必須是整數，改用預設大小")
+        return VIEW_WIDTH, VIEW_HEIGHT
+    if not (1 <= width <= 65535 and 1 <= height <= 65535) or width * height > MAX_CELLS:
+        print(f"棋盤大小 {width}x{height} 超出範圍（每邊 1 到 65535，最多 {MAX_CELLS} 格），改用預設大小")
+        return VIEW_WIDTH, VIEW_HEIGHT
+    return width, height
+
+# 棋盤大小（格數），預設剛好填滿遊戲區；比遊戲區大時鏡頭跟著蛇頭捲動，只畫看得到的格子
+GRID_WIDTH, GRID_HEIGHT = board_size_setting()
+CAMERA_MARGIN = 8  # 蛇頭與視野邊緣至少保持的格數，再靠近就捲動
+
+INTRO_PARTICLE_SCALE = int(os.environ.get("SNAKE_INTRO_PARTICLES", 1))  # 開場粒子數量倍率
+# 畫面更新率：數字為每秒幀數上限，0 表示不限制，vsync 表示跟隨螢幕垂直同步
+_FPS_SETTING = os.environ.get("SNAKE_FPS", "60")
+VSYNC = _FPS_SETTING == "vsync"
+RENDER_FPS = 0 if VSYNC else int(_FPS_SETTING)
+MAX_FRAME_TIME = 250  # 單幀最多補算的時間（毫秒），避免卡頓後一次模擬太多步
+INTERPOLATE = os.environ.get("SNAKE_INTERPOLATE", "1") != "0"  # 蛇頭是否在格子間平滑移動
+INPUT_BUFFER_SIZE = 3  # 每次移動只消耗一個方向，最多暫存的按鍵數
+REPORT_INPUT_LATENCY = os.environ.get("SNAKE_INPUT_STATS") == "1"  # 遊戲結束時輸出按鍵延遲統計
+HUD_RECT = pygame.Rect(0, 0, 350, 98)
+# 遊戲畫面只重畫有變動的區域（蛇頭、蛇尾、食物、分數），設為 0 則每幀重畫整個視窗
+DIRTY_RECTS = os.environ.get("SNAKE_DIRTY_RECTS", "1") != "0"
+
+LEADERBOARD_SIZE = int(os.environ.get("SNAKE_LEADERBOARD_SIZE", 5))
+
+# 設定 SNAKE_SERVER（例如 http://127.0.0.1:8000）時改用 server.py 提供的共用排行榜
+SERVER_URL = os.environ.get("SNAKE_SERVER")
+api = ScoreClient(SERVER_URL) if SERVER_URL else None
+
+# 字體在第一次使用時才載入
+fonts = FontSet()
+
+class TextCache:
+    """font.render 的結果快取（LRU），鍵為 (字體, 文字, 顏色, 反鋸齒)。
+    中文字型點陣化成本高，固定的文字只會渲染一次，分數等動態文字也只在數值改變時重新渲染"""
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
     
-    # 如果找不到中文字體，使用默認字體
-    print("警告: 未找到中文字體，使用默認字體")
-    return (pygame.font.Font(None, 40), 
-           pygame.font.Font(None, 28), 
-           pygame.font.Font(None, 24), 
-           pygame.font.Font(None, 20))
+    def render(self, font, text, antialias, color):
+        key = (font, text, antialias, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        self.misses += 1
+        with profiler.section("font.render"):
+            surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+    
+    def clear(self):
+        self.surfaces.clear()
+
+text_cache = TextCache()
+
+def render_text(font, text, antialias, color, alpha=None):
+    """從快取取得文字 Surface；回傳的 Surface 會被共用，除了透明度之外不要修改"""
+    surface = text_cache.render(font, text, antialias, color)
+    if alpha is not None:
+        surface.set_alpha(alpha)
+    return surface
+
+class BackgroundCache:
+    """畫面中不會變動的部分只畫一次到 Surface 上，之後每幀直接 blit"""
+    def __init__(self):
+        self.surfaces = {}
+    
+    def get(self, key, builder):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = builder()
+            self.surfaces[key] = surface
+        return surface
+    
+    def clear(self):
+        self.surfaces.clear()
 
-# 載入字體
-big_title_font, title_font, normal_font, small_font = load_chinese_font()
+backgrounds = BackgroundCache()
 
 class IntroAnimation:
     def __init__(self):
@@ -73,26 +150,10 @@ class IntroAnimation:
         self.finished = False
         self.logo_scale = 0
         self.text_alpha = 0
-        self.snake_positions = []
-        self.food_positions = []
-        self.sparkles = []
-        self.init_effects()
-    
-    def init_effects(self):
-        for i in range(20):
-            x = random.randint(50, WINDOW_SIZE[0] - 50)
-            y = random.randint(100, WINDOW_SIZE[1] - 100)
-            self.snake_positions.append([x, y, random.uniform(0, 2*math.pi)])
-        
-        for i in range(10):
-            x = random.randint(50, WINDOW_SIZE[0] - 50)
-            y = random.randint(100, WINDOW_SIZE[1] - 100)
-            self.food_positions.append([x, y, random.uniform(0, 1)])
-        
-        for i in range(30):
-            x = random.randint(0, WINDOW_SIZE[0])
-            y = random.randint(0, WINDOW_SIZE[1])
-            self.sparkles.append([x, y, random.uniform(0, 1), random.uniform(1, 3)])
+        scale = INTRO_PARTICLE_SCALE
+        self.particles = IntroParticles(WINDOW_SIZE[0], WINDOW_SIZE[1],
+                                        ((GREEN, DARK_GREEN), RED, WHITE),
+                                        snakes=20 * scale, foods=10 * scale, sparkles=30 * scale)
     
     def update(self):
         current_time = pygame.time.get_ticks()
@@ -111,67 +172,26 @@ class IntroAnimation:
             self.logo_scale = 1.0
             self.text_alpha = (progress - 0.6) / 0.4 * 255
         
-        for pos in self.snake_positions:
-            pos[2] += 0.05
-            pos[0] += math.cos(pos[2]) * 2
-            pos[1] += math.sin(pos[2]) * 1
-            
-            if pos[0] < 0 or pos[0] > WINDOW_SIZE[0]:
-                pos[0] = random.randint(50, WINDOW_SIZE[0] - 50)
-            if pos[1] < 0 or pos[1] > WINDOW_SIZE[1]:
-                pos[1] = random.randint(100, WINDOW_SIZE[1] - 100)
-        
-        for pos in self.food_positions:
-            pos[2] += 0.02
-            if pos[2] > 1:
-                pos[2] = 0
-        
-        for sparkle in self.sparkles:
-            sparkle[2] += 0.05
-            if sparkle[2] > 1:
-                sparkle[2] = 0
-                sparkle[0] = random.randint(0, WINDOW_SIZE[0])
-                sparkle[1] = random.randint(0, WINDOW_SIZE[1])
+        self.particles.update()
     
-    def draw(self, screen):
+    @staticmethod
+    def build_gradient():
+        surface = pygame.Surface(WINDOW_SIZE).convert()
         for y in range(WINDOW_SIZE[1]):
             color_value = int(40 + (y / WINDOW_SIZE[1]) * 20)
             color = (color_value, color_value + 4, color_value + 8)
-            pygame.draw.line(screen, color, (0, y), (WINDOW_SIZE[0], y))
-        
-        for i, pos in enumerate(self.snake_positions):
-            alpha = int(100 * math.sin(pos[2]) ** 2)
-            if alpha > 0:
-                size = 15 + int(5 * math.sin(pos[2] * 2))
-                color = (*GREEN, alpha) if i % 2 == 0 else (*DARK_GREEN, alpha)
-                surf = pygame.Surface((size, size))
-                surf.set_alpha(alpha)
-                surf.fill(GREEN if i % 2 == 0 else DARK_GREEN)
-                screen.blit(surf, (int(pos[0]), int(pos[1])))
-        
-        for pos in self.food_positions:
-            alpha = int(150 * pos[2])
-            if alpha > 0:
-                size = int(10 + 5 * pos[2])
-                surf = pygame.Surface((size, size))
-                surf.set_alpha(alpha)
-                surf.fill(RED)
-                screen.blit(surf, (int(pos[0]), int(pos[1])))
-        
-        # 繪製閃爍特效
-        for sparkle in self.sparkles:
-            if sparkle[2] < 0.5:
-                alpha = int(255 * (sparkle[2] * 2))
-                size = int(sparkle[3])
-                surf = pygame.Surface((size, size))
-                surf.set_alpha(alpha)
-                surf.fill(WHITE)
-                screen.blit(surf, (int(sparkle[0]), int(sparkle[1])))
+            pygame.draw.line(surface, color, (0, y), (WINDOW_SIZE[0], y))
+        return surface
+    
+    def draw(self, screen):
+        screen.blit(backgrounds.get("intro", self.build_gradient), (0, 0))
+        # 蛇身方塊、食物與閃爍特效
+        self.particles.draw(screen)
         
         if self.logo_scale > 0:
             
             title_text = "貪食蛇遊戲"
-            title_surface = big_title_font.render(title_text, True, WHITE)
+            title_surface = render_text(fonts.big_title, title_text, True, WHITE)
             
             
             if self.logo_scale < 1.0:
@@ -185,38 +205,39 @@ class IntroAnimation:
             
             if self.logo_scale >= 0.8:
                 subtitle = "Snake Game System"
-                subtitle_surface = title_font.render(subtitle, True, CYAN)
+                subtitle_surface = render_text(fonts.title, subtitle, True, CYAN)
                 subtitle_rect = subtitle_surface.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2 + 10))
                 screen.blit(subtitle_surface, subtitle_rect)
         
         
         if self.text_alpha > 0:
             copyright_text = "Copyright by Leroy Chang"
-            copyright_surface = normal_font.render(copyright_text, True, WHITE)
-            copyright_surface.set_alpha(int(self.text_alpha))
+            copyright_surface = render_text(fonts.normal, copyright_text, True, WHITE,
+                                            int(self.text_alpha))
             copyright_rect = copyright_surface.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1] - 100))
             screen.blit(copyright_surface, copyright_rect)
             
             
             loading_text = "Loading..."
-            loading_surface = small_font.render(loading_text, True, GRAY)
-            loading_surface.set_alpha(int(self.text_alpha))
+            loading_surface = render_text(fonts.small, loading_text, True, GRAY,
+                                          int(self.text_alpha))
             loading_rect = loading_surface.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1] - 50))
             screen.blit(loading_surface, loading_rect)
 
 class Leaderboard:
-    def __init__(self):
+    def __init__(self, jobs, size=LEADERBOARD_SIZE):
         self.visible = False
+        self.jobs = jobs
+        self.size = size
         self.top_players = []
         self.update_leaderboard()
     
     def update_leaderboard(self):
-        """更新排行榜數據"""
-        users = load_users()
-        sorted_users = sorted(users.items(), 
-                            key=lambda x: x[1].get('high_score', 0), 
-                            reverse=True)
-        self.top_players = sorted_users[:5]
+        """在背景更新排行榜數據"""
+        self.jobs.submit(fetch_top_players, self.size, callback=self.set_top_players)
+    
+    def set_top_players(self, top_players):
+        self.top_players = top_players
     
     def toggle_visibility(self):
         """切換排行榜顯示狀態"""
@@ -228,30 +249,25 @@ class Leaderboard:
         if not self.visible:
             return
 
-        overlay = pygame.Surface(WINDOW_SIZE)
-        overlay.set_alpha(180)
-        overlay.fill(BLACK)
-        screen.blit(overlay, (0, 0))
-        
         board_width = 400
-        board_height = 350
+        board_height = min(150 + len(self.top_players) * 40, WINDOW_SIZE[1] - 40)
         board_x = (WINDOW_SIZE[0] - board_width) // 2
         board_y = (WINDOW_SIZE[1] - board_height) // 2
         
-        pygame.draw.rect(screen, BACKGROUND, (board_x, board_y, board_width, board_height))
-        pygame.draw.rect(screen, WHITE, (board_x, board_y, board_width, board_height), 3)
-        
-        title_text = title_font.render("🏆 排行榜 Top 5", True, YELLOW)
-        title_rect = title_text.get_rect(center=(WINDOW_SIZE[0]//2, board_y + 40))
-        screen.blit(title_text, title_rect)
+        overlay = backgrounds.get("leaderboard_overlay", self.build_overlay)
+        screen.blit(overlay, (0, 0))
+        frame = backgrounds.get(("leaderboard", self.size, board_height),
+                                lambda: self.build_frame(board_width, board_height))
+        screen.blit(frame, (board_x, board_y))
         
         if not self.top_players:
-            no_data_text = normal_font.render("暫無排行榜數據", True, GRAY)
+            no_data_text = render_text(fonts.normal, "暫無排行榜數據", True, GRAY)
             no_data_rect = no_data_text.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2))
             screen.blit(no_data_text, no_data_rect)
         else:
             start_y = board_y + 80
-            for i, (username, user_data) in enumerate(self.top_players):
+            max_rows = (board_height - 150) // 40
+            for i, (username, user_data) in enumerate(self.top_players[:max_rows]):
                 rank = i + 1
                 score = user_data.get('high_score', 0)
                 if rank == 1:
@@ -263,16 +279,34 @@ class Leaderboard:
                 else:
                     rank_color = WHITE
             
-                rank_text = normal_font.render(f"#{rank}", True, rank_color)
+                rank_text = render_text(fonts.normal, f"#{rank}", True, rank_color)
                 screen.blit(rank_text, (board_x + 30, start_y + i * 40))
-                name_text = normal_font.render(username, True, WHITE)
+                name_text = render_text(fonts.normal, username, True, WHITE)
                 screen.blit(name_text, (board_x + 80, start_y + i * 40))
-                score_text = normal_font.render(f"{score} 分", True, GREEN)
+                score_text = render_text(fonts.normal, f"{score} 分", True, GREEN)
                 screen.blit(score_text, (board_x + 280, start_y + i * 40))
 
-        close_text = small_font.render("按 TAB 鍵關閉", True, GRAY)
-        close_rect = close_text.get_rect(center=(WINDOW_SIZE[0]//2, board_y + board_height - 30))
-        screen.blit(close_text, close_rect)
+    @staticmethod
+    def build_overlay():
+        overlay = pygame.Surface(WINDOW_SIZE).convert()
+        overlay.set_alpha(180)
+        overlay.fill(BLACK)
+        return overlay
+    
+    def build_frame(self, board_width, board_height):
+        """排行榜的外框、標題與提示文字"""
+        frame = pygame.Surface((board_width, board_height)).convert()
+        frame.fill(BACKGROUND)
+        pygame.draw.rect(frame, WHITE, (0, 0, board_width, board_height), 3)
+        
+        title_text = render_text(fonts.title, f"🏆 排行榜 Top {self.size}", True, YELLOW)
+        title_rect = title_text.get_rect(center=(board_width//2, 40))
+        frame.blit(title_text, title_rect)
+        
+        close_text = render_text(fonts.small, "按 TAB 鍵關閉", True, GRAY)
+        close_rect = close_text.get_rect(center=(board_width//2, board_height - 30))
+        frame.blit(close_text, close_rect)
+        return frame
 
 class InputBox:
     def __init__(self, x, y, w, h, text='', is_password=False):
@@ -312,7 +346,7 @@ class InputBox:
         pygame.draw.rect(screen, BLACK, self.rect, 2)
         
         display_text = '*' * len(self.text) if self.is_password else self.text
-        text_surface = normal_font.render(display_text, True, BLACK)
+        text_surface = render_text(fonts.normal, display_text, True, BLACK)
         screen.blit(text_surface, (self.rect.x + 5, self.rect.y + 8))
         
         if self.active and self.cursor_visible:
@@ -342,94 +376,306 @@ class Button:
         pygame.draw.rect(screen, color, self.rect)
         pygame.draw.rect(screen, BLACK, self.rect, 2)
         
-        text_surface = normal_font.render(self.text, True, WHITE)
+        text_surface = render_text(fonts.normal, self.text, True, WHITE)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
-class Snake:
-    def __init__(self):
-        self.reset()
+def build_tile(color):
+    """單一格子的方塊，蛇身以 screen.blits 一次貼上所有格子"""
+    tile = pygame.Surface((GRID_SIZE - 1, GRID_SIZE - 1)).convert()
+    tile.fill(color)
+    return tile
+
+class Camera:
+    """決定棋盤的哪一塊顯示在遊戲區。棋盤比遊戲區大時只顯示 VIEW_WIDTH x VIEW_HEIGHT 格，
+    蛇頭離視野邊緣少於 CAMERA_MARGIN 格就捲動，並且不會捲出棋盤；棋盤比遊戲區小時置中顯示。
+    (x, y) 是視野左上角的格子"""
+    def __init__(self, engine):
+        self.engine = engine
+        self.cols = min(VIEW_WIDTH, engine.width)
+        self.rows = min(VIEW_HEIGHT, engine.height)
+        self.cell_count = self.cols * self.rows
+        self.rect = pygame.Rect(BOARD_RECT.x + (BOARD_RECT.width - self.cols * GRID_SIZE) // 2,
+                                BOARD_RECT.y + (BOARD_RECT.height - self.rows * GRID_SIZE) // 2,
+                                self.cols * GRID_SIZE, self.rows * GRID_SIZE)
+        self.x = 0
+        self.y = 0
+        self.center()
     
-    def reset(self):
-        self.body = [(GRID_WIDTH//2, GRID_HEIGHT//2)]
-        self.direction = (1, 0)
-        self.grow = False
+    def center(self):
+        """把蛇頭放在視野中央，開始新的一局時呼叫"""
+        head_x, head_y = self.engine.body[0]
+        self.x = max(0, min(head_x - self.cols // 2, self.engine.width - self.cols))
+        self.y = max(0, min(head_y - self.rows // 2, self.engine.height - self.rows))
     
-    def move(self):
-        head_x, head_y = self.body[0]
-        new_head = (head_x + self.direction[0], head_y + self.direction[1])
-        
-        if (new_head[0] < 0 or new_head[0] >= GRID_WIDTH or 
-            new_head[1] < 0 or new_head[1] >= GRID_HEIGHT):
-            return False
-
-        if new_head in self.body:
-            return False
-        
-        self.body.insert(0, new_head)
-        
-        if not self.grow:
-            self.body.pop()
-        else:
-            self.grow = False
-        
-        return True
+    def follow(self):
+        """蛇頭太靠近視野邊緣時捲動，回傳鏡頭是否移動"""
+        head_x, head_y = self.engine.body[0]
+        x = self._follow_axis(self.x, head_x, self.cols, self.engine.width)
+        y = self._follow_axis(self.y, head_y, self.rows, self.engine.height)
+        moved = (x, y) != (self.x, self.y)
+        self.x, self.y = x, y
+        return moved
     
-    def change_direction(self, new_direction):
-        if (new_direction[0] * -1, new_direction[1] * -1) != self.direction:
-            self.direction = new_direction
+    @staticmethod
+    def _follow_axis(start, head, size, limit):
+        margin = min(CAMERA_MARGIN, (size - 1) // 2)
+        if head < start + margin:
+            start = head - margin
+        elif head >= start + size - margin:
+            start = head - size + margin + 1
+        return max(0, min(start, limit - size))
     
-    def eat_food(self):
-        self.grow = True
+    def walls(self):
+        """視野的左、上、右、下邊是否剛好是棋盤邊界"""
+        return (self.x == 0, self.y == 0,
+                self.x + self.cols == self.engine.width, self.y + self.rows == self.engine.height)
     
-    def draw(self, screen):
-        for i, (x, y) in enumerate(self.body):
-            color = DARK_GREEN if i == 0 else GREEN
-            pygame.draw.rect(screen, color, 
-                           (x * GRID_SIZE, y * GRID_SIZE + 100, GRID_SIZE-1, GRID_SIZE-1))
+    def visible(self, cell):
+        return 0 <= cell[0] - self.x < self.cols and 0 <= cell[1] - self.y < self.rows
+    
+    def cell_pos(self, x, y):
+        return (self.rect.x + (x - self.x) * GRID_SIZE, self.rect.y + (y - self.y) * GRID_SIZE)
+    
+    def cell_rect(self, x, y):
+        return pygame.Rect(self.cell_pos(x, y), (GRID_SIZE-1, GRID_SIZE-1))
+    
+    def visible_body(self):
+        """視野內的蛇身格子（不含蛇頭）。蛇身比視野格數短時逐節檢查，否則逐列掃描
+        engine.occupied，兩種方式的成本都不超過視野的格數，與棋盤大小、蛇的長度無關"""
+        engine = self.engine
+        body = engine.body
+        if len(body) <= self.cell_count:
+            visible = self.visible
+            return [cell for cell in islice(body, 1, None) if visible(cell)]
+        head = body[0]
+        occupied = engine.occupied
+        cells = []
+        for y in range(self.y, self.y + self.rows):
+            start = y * engine.width + self.x
+            row = occupied[start:start + self.cols]
+            i = row.find(1)
+            while i != -1:
+                cell = (self.x + i, y)
+                if cell != head:
+                    cells.append(cell)
+                i = row.find(1, i + 1)
+        return cells
 
-class Food:
-    def __init__(self):
-        self.position = self.generate_position()
+class Snake:
+    """繪製引擎中的蛇身，只畫鏡頭視野內的格子。
+    drawn 是上次畫到螢幕上的蛇身格子（不含蛇頭），draw_dirty 在 engine.ticks 改變時
+    與目前視野內的蛇身比較，擦掉移走的格子、補畫新的格子，並回傳變動的矩形。
+    蛇頭依 alpha（距離下一次移動的進度）畫在前一格與目前這格之間，head_cells 記錄
+    上次蛇頭畫到的格子，下一幀要先還原"""
+    def __init__(self, engine, camera):
+        self.engine = engine
+        self.camera = camera
+        self.drawn = set()
+        self.drawn_ticks = 0
+        self.head_cells = ()
+    
+    @staticmethod
+    def body_tile():
+        return backgrounds.get(("tile", GREEN), lambda: build_tile(GREEN))
+    
+    def draw(self, screen, alpha=1.0):
+        cells = self.camera.visible_body()
+        tile = self.body_tile()
+        cell_pos = self.camera.cell_pos
+        screen.blits([(tile, cell_pos(x, y)) for x, y in cells], doreturn=False)
+        self.draw_head(screen, alpha)
+        self.drawn = set(cells)
+        self.drawn_ticks = self.engine.ticks
     
-    def generate_position(self):
-        return (random.randint(0, GRID_WIDTH-1), random.randint(0, GRID_HEIGHT-1))
+    def draw_head(self, screen, alpha):
+        body = self.engine.body
+        head = body[0]
+        rect = self.camera.cell_rect(*head)
+        if INTERPOLATE and len(body) > 1 and alpha < 1.0:
+            previous = body[1]
+            rect.x += round((previous[0] - head[0]) * GRID_SIZE * (1.0 - alpha))
+            rect.y += round((previous[1] - head[1]) * GRID_SIZE * (1.0 - alpha))
+            self.head_cells = (head, previous)
+        else:
+            self.head_cells = (head,)
+        pygame.draw.rect(screen, DARK_GREEN, rect)
     
-    def respawn(self, snake_body):
-        while True:
-            self.position = self.generate_position()
-            if self.position not in snake_body:
-                break
+    def draw_head_dirty(self, screen, background, alpha):
+        """還原上一幀與這一幀蛇頭經過的格子，再畫出蛇頭，需在其他 draw_dirty 之後呼叫"""
+        engine = self.engine
+        head = engine.body[0]
+        cells = set(self.head_cells)
+        cells.add(head)
+        if len(engine.body) > 1:
+            cells.add(engine.body[1])
+        
+        rects = []
+        for cell in cells:
+            if not self.camera.visible(cell):
+                continue
+            # 移動中的蛇頭會蓋到格子間的縫隙，還原時包含縫隙
+            area = pygame.Rect(self.camera.cell_pos(*cell), (GRID_SIZE, GRID_SIZE))
+            screen.blit(background, area, area)
+            if cell != head and engine.is_occupied(cell):
+                screen.blit(self.body_tile(), area.topleft)
+            elif cell == engine.food:
+                pygame.draw.rect(screen, RED, self.camera.cell_rect(*cell))
+            rects.append(area)
+        self.draw_head(screen, alpha)
+        return rects
+    
+    def draw_dirty(self, screen, background):
+        if self.engine.ticks == self.drawn_ticks:
+            return []
+        current = set(self.camera.visible_body())
+        cell_rect = self.camera.cell_rect
+        rects = []
+        for cell in self.drawn - current:
+            rect = cell_rect(*cell)
+            screen.blit(background, rect, rect)
+            rects.append(rect)
+        tile = self.body_tile()
+        for cell in current - self.drawn:
+            rect = cell_rect(*cell)
+            screen.blit(tile, rect)
+            rects.append(rect)
+        
+        self.drawn = current
+        self.drawn_ticks = self.engine.ticks
+        return rects
+
+class Food:
+    """繪製引擎中的食物，不在視野內時不畫"""
+    def __init__(self, engine, camera):
+        self.engine = engine
+        self.camera = camera
+        self.drawn = None
     
     def draw(self, screen):
-        x, y = self.position
-        pygame.draw.rect(screen, RED, 
-                        (x * GRID_SIZE, y * GRID_SIZE + 100, GRID_SIZE-1, GRID_SIZE-1))
+        self.drawn = self.engine.food
+        if self.engine.food is None or not self.camera.visible(self.engine.food):
+            return
+        pygame.draw.rect(screen, RED, self.camera.cell_rect(*self.engine.food))
+    
+    def draw_dirty(self, screen, background):
+        """食物位置改變時擦掉舊的並畫出新的，需在 Snake.draw_dirty 之後呼叫"""
+        if self.engine.food == self.drawn:
+            return []
+        rects = []
+        if (self.drawn is not None and self.camera.visible(self.drawn) and
+                not self.engine.is_occupied(self.drawn)):
+            rect = self.camera.cell_rect(*self.drawn)
+            screen.blit(background, rect, rect)
+            rects.append(rect)
+        self.drawn = self.engine.food
+        if self.drawn is not None and self.camera.visible(self.drawn):
+            rect = self.camera.cell_rect(*self.drawn)
+            pygame.draw.rect(screen, RED, rect)
+            rects.append(rect)
+        return rects
+
+def init_display():
+    """初始化 Pygame 並建立視窗"""
+    global screen
+    pygame.init()
+    if VSYNC:
+        screen = pygame.display.set_mode(WINDOW_SIZE, pygame.SCALED, vsync=1)
+    else:
+        screen = pygame.display.set_mode(WINDOW_SIZE)
+    pygame.display.set_caption("貪食蛇遊戲系統")
+    return screen
+
+# 以下函式都在背景執行緒中執行，依設定呼叫本機 auth.py 或遠端伺服器；開啟效能分析時會記錄耗時
+@profiler.timed
+def login_and_fetch(username, password):
+    """登入並讀取用戶資料"""
+    if api is not None:
+        return api.login(username, password)
+    success, message = login_user(username, password)
+    user_info = get_user_info(username) if success else None
+    return success, message, user_info
+
+@profiler.timed
+def register_account(username, password):
+    if api is not None:
+        return api.register(username, password)
+    return register_user(username, password)
+
+@profiler.timed
+def fetch_top_players(limit):
+    if api is not None:
+        return api.leaderboard(limit)
+    return get_top_players(limit)
+
+@profiler.timed
+def save_score(username, score, leaderboard_size, replay=None):
+    """保存新的最高分並回傳 (名次, 排行榜)；有重播時先重新模擬確認分數"""
+    if api is not None:
+        if score is not None:
+            _, rank = api.submit_score(score, replay)
+        else:
+            rank = api.rank()
+        return rank, api.leaderboard(leaderboard_size)
+    if score is not None:
+        is_valid, message = True, ""
+        if replay is not None:
+            # 排行榜只收預設棋盤大小與速度規則的成績，其他設定的分數不列入排名
+            is_valid, message = check_rules(replay)
+            if is_valid:
+                is_valid, message = verify_replay(replay, score)
+        if not is_valid:
+            print(f"分數未列入排行榜: {message}")
+        elif update_high_score(username, score) and replay is not None:
+            save_replay(username, replay)
+    return get_rank(username), get_top_players(leaderboard_size)
 
 class GameState:
     INTRO = "intro"
     LOGIN = "login"
     GAME = "game"
     GAME_OVER = "game_over"
+    REPLAY = "replay"
 
 class Game:
     def __init__(self):
         self.state = GameState.INTRO
         self.intro_animation = IntroAnimation()
         self.current_user = None
-        self.snake = Snake()
-        self.food = Food()
-        self.score = 0
+        self.prepared_engine = None
+        self.set_board(VIEW_WIDTH, VIEW_HEIGHT)
         self.high_score = 0
-        self.game_speed = 10
-        self.last_move_time = 0
-        self.leaderboard = Leaderboard()
+        self.rank = None
+        self.drawn_hud = None
+        self.last_frame = None
+        self.accumulator = 0.0
+        self.last_update = 0.0
+        self.tick_times = deque(maxlen=240)  # 最近幾幀的 (perf_counter 時間, 這一幀執行的步數)
+        self.input_queue = deque(maxlen=INPUT_BUFFER_SIZE)
+        self.input_latencies = deque(maxlen=500)
+        self.replay = None
+        self.playback_actions = []
+        self.time_scale = 1  # 重播時的快轉倍率
+        self.jobs = JobRunner()
+        self.auth_pending = False
+        self.leaderboard = Leaderboard(self.jobs)
+        if (GRID_WIDTH, GRID_HEIGHT) != (VIEW_WIDTH, VIEW_HEIGHT):
+            # 大棋盤的引擎要建立數百萬格的索引，在開場動畫與登入期間於背景完成
+            self.jobs.submit(SnakeEngine, GRID_WIDTH, GRID_HEIGHT, callback=self.on_board_ready)
         
         # 登入
         self.setup_login_ui()
         self.feedback_message = "請輸入用戶名和密碼"
         self.feedback_color = BLACK
         
+    @property
+    def score(self):
+        return self.engine.score
+    
+    @property
+    def game_speed(self):
+        return self.engine.speed
+    
     def setup_login_ui(self):
         self.username_input = InputBox(275, 200, 250, 35)
         self.password_input = InputBox(275, 260, 250, 35, is_password=True)
@@ -450,16 +696,42 @@ class Game:
             self.update_feedback("請輸入用戶名和密碼")
             return
         
-        success, message = login_user(username, password)
+        if self.auth_pending:
+            return
         
+        # 密碼驗證與讀檔在背景執行，完成後由 jobs.poll() 呼叫 on_login_done
+        self.set_auth_pending("登入中")
+        self.jobs.submit(login_and_fetch, username, password,
+                         callback=lambda result: self.on_login_done(username, result),
+                         on_error=self.on_auth_error)
+    
+    def set_auth_pending(self, message):
+        self.auth_pending = True
+        self.feedback_message = message
+        self.feedback_color = BLACK
+    
+    def on_auth_error(self, error):
+        self.auth_pending = False
+        self.update_feedback("系統錯誤，請稍後再試")
+    
+    def on_login_done(self, username, result):
+        self.auth_pending = False
+        success, message, user_info = result
         if success:
             self.current_user = username
-            user_info = get_user_info(username)
             self.high_score = user_info.get('high_score', 0) if user_info else 0
             self.start_game()
         else:
             self.update_feedback(message)
     
+    def on_register_done(self, result):
+        self.auth_pending = False
+        success, message = result
+        self.update_feedback(message, success)
+        if success:
+            self.username_input.text = ""
+            self.password_input.text = ""
+    
     def handle_register(self):
         username = self.username_input.text.strip()
         password = self.password_input.text
@@ -468,33 +740,94 @@ class Game:
             self.update_feedback("請輸入用戶名和密碼")
             return
         
-        success, message = register_user(username, password)
-        self.update_feedback(message, success)
+        if self.auth_pending:
+            return
         
-        if success:
-            self.username_input.text = ""
-            self.password_input.text = ""
+        self.set_auth_pending("註冊中")
+        self.jobs.submit(register_account, username, password,
+                         callback=self.on_register_done, on_error=self.on_auth_error)
     
     def clear_inputs(self):
         self.username_input.text = ""
         self.password_input.text = ""
         self.update_feedback("輸入框已清空")
     
+    def set_board(self, width, height):
+        """換成 width x height 的棋盤，大小不變時沿用目前的引擎，背景已建好相同大小的引擎時直接使用"""
+        engine = getattr(self, "engine", None)
+        if engine is not None and (engine.width, engine.height) == (width, height):
+            return
+        prepared, self.prepared_engine = self.prepared_engine, None
+        if prepared is not None and (prepared.width, prepared.height) == (width, height):
+            self.engine = prepared
+        else:
+            self.engine = SnakeEngine(width, height)
+        self.camera = Camera(self.engine)
+        self.snake = Snake(self.engine, self.camera)
+        self.food = Food(self.engine, self.camera)
+    
+    def on_board_ready(self, engine):
+        self.prepared_engine = engine
+    
     def start_game(self):
         self.state = GameState.GAME
-        self.snake.reset()
-        self.food.respawn(self.snake.body)
-        self.score = 0
-        self.game_speed = 10
-        self.last_move_time = pygame.time.get_ticks()
+        self.set_board(GRID_WIDTH, GRID_HEIGHT)
+        # 播放過其他重播檔後恢復預設的速度規則
+        self.engine.initial_speed = INITIAL_SPEED
+        self.engine.speed_step = SPEED_STEP
+        self.engine.max_speed = MAX_SPEED
+        self.engine.reset()
+        self.camera.center()
+        self.replay = Replay.start(self.engine)
+        self.time_scale = 1
+        self.accumulator = 0.0
+        self.last_update = time.perf_counter()
+        self.tick_times.clear()
+        self.input_queue.clear()
+        self.input_latencies.clear()
         self.leaderboard.visible = False 
     
     def game_over(self):
         self.state = GameState.GAME_OVER
+        stats = self.input_latency_stats()
+        if REPORT_INPUT_LATENCY and stats:
+            print(f"按鍵延遲: 平均 {stats['mean']:.1f}ms, p95 {stats['p95']:.1f}ms, "
+                  f"最大 {stats['max']:.1f}ms（{stats['count']} 次轉向, 速度 {self.game_speed}）")
+        tick_rate = self.measured_tick_rate()
+        if REPORT_INPUT_LATENCY and tick_rate is not None:
+            print(f"實際移動速率: 每秒 {tick_rate:.2f} 步（設定速度 {self.game_speed}）")
+        self.rank = None
+        new_score = None
         if self.score > self.high_score:
             self.high_score = self.score
-            update_high_score(self.current_user, self.score)
-            self.leaderboard.update_leaderboard()
+            new_score = self.score
+        # 存檔與排行榜查詢都在背景執行，避免遊戲結束時畫面卡頓
+        self.jobs.submit(save_score, self.current_user, new_score, self.leaderboard.size,
+                         self.replay, callback=self.on_score_saved)
+    
+    def on_score_saved(self, result):
+        self.rank, top_players = result
+        self.leaderboard.set_top_players(top_players)
+    
+    def start_playback(self, replay, speed=1):
+        """以 speed 倍速重播，結束後回到遊戲結束畫面；棋盤換成重播錄製時的大小"""
+        self.set_board(replay.width, replay.height)
+        self.engine.initial_speed = replay.initial_speed
+        self.engine.speed_step = replay.speed_step
+        self.engine.max_speed = replay.max_speed
+        self.engine.reset(replay.seed)
+        self.camera.center()
+        self.playback_actions = replay.actions()
+        self.state = GameState.REPLAY
+        self.time_scale = speed
+        self.accumulator = 0.0
+        self.last_update = time.perf_counter()
+        self.leaderboard.visible = False
+    
+    def end_playback(self):
+        # 單獨播放重播檔時沒有登入的用戶，直接回到登入畫面
+        self.state = GameState.GAME_OVER if self.current_user else GameState.LOGIN
+        self.time_scale = 1
     
     def restart_game(self):
         self.start_game()
@@ -536,18 +869,38 @@ class Game:
     def handle_game_events(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_UP:
-                self.snake.change_direction((0, -1))
+                self.queue_direction(UP)
             elif event.key == pygame.K_DOWN:
-                self.snake.change_direction((0, 1))
+                self.queue_direction(DOWN)
             elif event.key == pygame.K_LEFT:
-                self.snake.change_direction((-1, 0))
+                self.queue_direction(LEFT)
             elif event.key == pygame.K_RIGHT:
-                self.snake.change_direction((1, 0))
+                self.queue_direction(RIGHT)
             elif event.key == pygame.K_ESCAPE:
                 self.logout()
             elif event.key == pygame.K_TAB:
                 self.leaderboard.toggle_visibility()
     
+    def queue_direction(self, direction):
+        """暫存轉向，與前一個暫存（或目前）的方向比較，略過重複與直接回頭的按鍵"""
+        last = self.input_queue[-1][0] if self.input_queue else self.engine.direction
+        if direction == last or direction == (-last[0], -last[1]):
+            return
+        if len(self.input_queue) < self.input_queue.maxlen:
+            self.input_queue.append((direction, time.perf_counter()))
+    
+    def input_latency_stats(self):
+        """按鍵到蛇實際轉向的延遲（毫秒）"""
+        if not self.input_latencies:
+            return None
+        latencies = sorted(self.input_latencies)
+        return {
+            "count": len(latencies),
+            "mean": sum(latencies) / len(latencies) * 1000,
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            "max": latencies[-1] * 1000,
+        }
+    
     def handle_game_over_events(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
@@ -556,42 +909,133 @@ class Game:
                 self.logout()
             elif event.key == pygame.K_TAB:
                 self.leaderboard.toggle_visibility()
+            elif event.key == pygame.K_r and self.replay is not None:
+                self.start_playback(self.replay)
+    
+    def handle_replay_events(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_f:
+                self.time_scale = 8 if self.time_scale == 1 else 1
+            elif event.key == pygame.K_ESCAPE:
+                self.end_playback()
     
     def update_game(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_move_time > (1000 // self.game_speed):
-            if not self.snake.move():
-                self.game_over()
+        """固定時間步長：依經過的時間執行足夠次數的 step()，剩下不足一步的時間留到下一幀"""
+        now = time.perf_counter()
+        self.accumulator += min((now - self.last_update) * 1000, MAX_FRAME_TIME)
+        self.last_update = now
+        playback = self.state == GameState.REPLAY
+        
+        step_time = 1000 / (self.game_speed * self.time_scale)
+        steps = 0
+        while self.accumulator >= step_time:
+            self.accumulator -= step_time
+            action = None
+            if playback:
+                if self.engine.ticks >= len(self.playback_actions):
+                    self.end_playback()
+                    return
+                action = self.playback_actions[self.engine.ticks]
+            elif self.input_queue:
+                action, pressed = self.input_queue.popleft()
+                self.input_latencies.append(now - pressed)
+            # 吃到食物、加分與加速都由引擎處理
+            result = self.engine.step(action)
+            steps += 1
+            if not playback:
+                self.replay.record(self.engine)
+            if result in (StepResult.DIED, StepResult.WON):
+                if playback:
+                    self.end_playback()
+                else:
+                    self.tick_times.append((now, steps))
+                    self.game_over()
                 return
-            
-            # 檢查是否吃到食物
-            if self.snake.body[0] == self.food.position:
-                self.snake.eat_food()
-                self.food.respawn(self.snake.body)
-                self.score += 10
-                # 增加遊戲速度
-                if self.game_speed < 20:
-                    self.game_speed += 0.5
-            
-            self.last_move_time = current_time
+            step_time = 1000 / (self.game_speed * self.time_scale)
+        if not playback:
+            self.tick_times.append((now, steps))
+    
+    @property
+    def interpolation(self):
+        """距離下一次移動的進度（0~1），用來畫出移動中的蛇頭"""
+        return min(self.accumulator * self.game_speed * self.time_scale / 1000, 1.0)
+    
+    def measured_tick_rate(self):
+        """最近幾幀實際的每秒移動次數（第一幀之後執行的步數除以經過的時間），資料不足時回傳 None"""
+        if len(self.tick_times) < 2:
+            return None
+        elapsed = self.tick_times[-1][0] - self.tick_times[0][0]
+        if elapsed <= 0:
+            return None
+        return sum(steps for _, steps in islice(self.tick_times, 1, None)) / elapsed
     
     def draw_intro_screen(self):
         self.intro_animation.draw(screen)
         if self.intro_animation.text_alpha > 100:
-            skip_text = small_font.render("按任意鍵跳過", True, WHITE)
-            skip_text.set_alpha(int(self.intro_animation.text_alpha))
+            skip_text = render_text(fonts.small, "按任意鍵跳過", True, WHITE,
+                                    int(self.intro_animation.text_alpha))
             skip_rect = skip_text.get_rect(topright=(WINDOW_SIZE[0] - 20, 20))
             screen.blit(skip_text, skip_rect)
     
-    def draw_login_screen(self):
-        screen.fill(BACKGROUND)
-        title_text = title_font.render("貪食蛇遊戲系統", True, WHITE)
+    @staticmethod
+    def build_login_background():
+        surface = pygame.Surface(WINDOW_SIZE).convert()
+        surface.fill(BACKGROUND)
+        title_text = render_text(fonts.title, "貪食蛇遊戲系統", True, WHITE)
         title_rect = title_text.get_rect(center=(WINDOW_SIZE[0]//2, 80))
-        screen.blit(title_text, title_rect)
-        username_label = normal_font.render("用戶名:", True, WHITE)
-        screen.blit(username_label, (180, 208))
-        password_label = normal_font.render("密碼:", True, WHITE)
-        screen.blit(password_label, (180, 268))
+        surface.blit(title_text, title_rect)
+        username_label = render_text(fonts.normal, "用戶名:", True, WHITE)
+        surface.blit(username_label, (180, 208))
+        password_label = render_text(fonts.normal, "密碼:", True, WHITE)
+        surface.blit(password_label, (180, 268))
+        help_text = render_text(fonts.small, "提示: 按Enter鍵快速登入 | 按TAB鍵查看排行榜", True, GRAY)
+        surface.blit(help_text, (50, 520))
+        return surface
+    
+    def game_background(self):
+        """依視野位置與哪幾邊是牆取得遊戲畫面背景"""
+        view = self.camera.rect
+        walls = self.camera.walls()
+        return backgrounds.get(("game", tuple(view), walls),
+                               lambda: self.build_game_background(view, walls))
+    
+    @staticmethod
+    def build_game_background(view, walls):
+        """只在碰得到的棋盤邊界畫框線，大棋盤捲動中的視野邊緣不畫"""
+        surface = pygame.Surface(WINDOW_SIZE).convert()
+        surface.fill(BACKGROUND)
+        left, top, right, bottom = walls
+        if left:
+            surface.fill(WHITE, (view.left, view.top, 2, view.height))
+        if top:
+            surface.fill(WHITE, (view.left, view.top, view.width, 2))
+        if right:
+            surface.fill(WHITE, (view.right - 2, view.top, 2, view.height))
+        if bottom:
+            surface.fill(WHITE, (view.left, view.bottom - 2, view.width, 2))
+        controls = render_text(fonts.small, "方向鍵控制移動 | ESC鍵登出 | TAB鍵查看排行榜", True, GRAY)
+        surface.blit(controls, (350, 35))
+        return surface
+    
+    @staticmethod
+    def build_game_over_background():
+        surface = pygame.Surface(WINDOW_SIZE).convert()
+        surface.fill(BACKGROUND)
+        restart_text = render_text(fonts.normal, "按空白鍵重新開始", True, GREEN)
+        restart_rect = restart_text.get_rect(center=(WINDOW_SIZE[0]//2, 420))
+        surface.blit(restart_text, restart_rect)
+        
+        logout_text = render_text(fonts.normal, "按ESC鍵登出", True, BLUE)
+        logout_rect = logout_text.get_rect(center=(WINDOW_SIZE[0]//2, 460))
+        surface.blit(logout_text, logout_rect)
+        
+        leaderboard_hint = render_text(fonts.small, "按TAB鍵查看排行榜 | 按R鍵觀看重播", True, GRAY)
+        leaderboard_rect = leaderboard_hint.get_rect(center=(WINDOW_SIZE[0]//2, 500))
+        surface.blit(leaderboard_hint, leaderboard_rect)
+        return surface
+    
+    def draw_login_screen(self):
+        screen.blit(backgrounds.get("login", self.build_login_background), (0, 0))
     
         self.username_input.draw(screen)
         self.password_input.draw(screen)
@@ -601,110 +1045,268 @@ class Game:
         self.leaderboard_button.draw(screen)
         
         
-        feedback_surface = normal_font.render(self.feedback_message, True, self.feedback_color)
+        feedback_message = self.feedback_message
+        if self.auth_pending:
+            feedback_message += "." * (pygame.time.get_ticks() // 300 % 4)
+        feedback_surface = render_text(fonts.normal, feedback_message, True, self.feedback_color)
         feedback_rect = feedback_surface.get_rect(center=(WINDOW_SIZE[0]//2, 450))
         screen.blit(feedback_surface, feedback_rect)
-        help_text = small_font.render("提示: 按Enter鍵快速登入 | 按TAB鍵查看排行榜", True, GRAY)
-        screen.blit(help_text, (50, 520))
         
         self.leaderboard.draw(screen)
     
     def draw_game_screen(self):
-        screen.fill(BACKGROUND)
-        pygame.draw.rect(screen, WHITE, (0, 100, WINDOW_SIZE[0], WINDOW_SIZE[1]-100), 2)
-        self.snake.draw(screen)
+        self.camera.follow()
+        screen.blit(self.game_background(), (0, 0))
+        self.snake.draw(screen, self.interpolation)
         self.food.draw(screen)
-        user_text = normal_font.render(f"玩家: {self.current_user}", True, WHITE)
+        self.draw_hud()
+        
+        self.leaderboard.draw(screen)
+    
+    def draw_game_screen_dirty(self):
+        """只重畫上一幀之後有變動的部分，回傳需要更新到螢幕的矩形"""
+        if self.camera.follow():
+            # 鏡頭捲動時整個遊戲區都位移了，改為重畫整個畫面
+            self.draw_game_screen()
+            return [screen.get_rect()]
+        background = self.game_background()
+        rects = self.snake.draw_dirty(screen, background)
+        rects += self.food.draw_dirty(screen, background)
+        rects += self.snake.draw_head_dirty(screen, background, self.interpolation)
+        hud_values = self.hud_values()
+        if hud_values != self.drawn_hud:
+            screen.blit(background, HUD_RECT, HUD_RECT)
+            self.draw_hud()
+            rects.append(HUD_RECT)
+        return rects
+    
+    def hud_values(self):
+        return (self.current_user, self.score, self.high_score, self.game_speed)
+    
+    def draw_hud(self):
+        self.drawn_hud = self.hud_values()
+        user_text = render_text(fonts.normal, f"玩家: {self.current_user}", True, WHITE)
         screen.blit(user_text, (20, 20))
-        score_text = normal_font.render(f"分數: {self.score}", True, WHITE)
+        score_text = render_text(fonts.normal, f"分數: {self.score}", True, WHITE)
         screen.blit(score_text, (20, 50))
-        high_score_text = normal_font.render(f"最高分: {self.high_score}", True, WHITE)
+        high_score_text = render_text(fonts.normal, f"最高分: {self.high_score}", True, WHITE)
         screen.blit(high_score_text, (200, 20))
-        speed_text = normal_font.render(f"速度: {self.game_speed:.1f}", True, WHITE)
+        speed_text = render_text(fonts.normal, f"速度: {self.game_speed:.1f}", True, WHITE)
         screen.blit(speed_text, (200, 50))
-        controls = small_font.render("方向鍵控制移動 | ESC鍵登出 | TAB鍵查看排行榜", True, GRAY)
-        screen.blit(controls, (350, 35))
-        
-        self.leaderboard.draw(screen)
     
     def draw_game_over_screen(self):
-        screen.fill(BACKGROUND)
+        screen.blit(backgrounds.get("game_over", self.build_game_over_background), (0, 0))
         
         # 遊戲結束標題
-        game_over_text = title_font.render("遊戲結束", True, RED)
+        if self.engine.won:
+            # 蛇佔滿棋盤，已經沒有位置放食物
+            game_over_text = render_text(fonts.title, "恭喜通關！", True, YELLOW)
+        else:
+            game_over_text = render_text(fonts.title, "遊戲結束", True, RED)
         game_over_rect = game_over_text.get_rect(center=(WINDOW_SIZE[0]//2, 200))
         screen.blit(game_over_text, game_over_rect)
-        final_score_text = normal_font.render(f"最終分數: {self.score}", True, WHITE)
+        if self.rank is not None:
+            rank_text = render_text(fonts.small, f"目前排名: 第 {self.rank} 名", True, CYAN)
+            rank_rect = rank_text.get_rect(center=(WINDOW_SIZE[0]//2, 245))
+            screen.blit(rank_text, rank_rect)
+        final_score_text = render_text(fonts.normal, f"最終分數: {self.score}", True, WHITE)
         final_score_rect = final_score_text.get_rect(center=(WINDOW_SIZE[0]//2, 280))
         screen.blit(final_score_text, final_score_rect)
-        high_score_text = normal_font.render(f"最高分數: {self.high_score}", True, WHITE)
+        high_score_text = render_text(fonts.normal, f"最高分數: {self.high_score}", True, WHITE)
         high_score_rect = high_score_text.get_rect(center=(WINDOW_SIZE[0]//2, 320))
         screen.blit(high_score_text, high_score_rect)
         
         if self.score == self.high_score and self.score > 0:
-            new_record_text = normal_font.render("🎉 新紀錄！", True, YELLOW)
+            new_record_text = render_text(fonts.normal, "🎉 新紀錄！", True, YELLOW)
             new_record_rect = new_record_text.get_rect(center=(WINDOW_SIZE[0]//2, 360))
             screen.blit(new_record_text, new_record_rect)
         
-        restart_text = normal_font.render("按空白鍵重新開始", True, GREEN)
-        restart_rect = restart_text.get_rect(center=(WINDOW_SIZE[0]//2, 420))
-        screen.blit(restart_text, restart_rect)
-        
-        logout_text = normal_font.render("按ESC鍵登出", True, BLUE)
-        logout_rect = logout_text.get_rect(center=(WINDOW_SIZE[0]//2, 460))
-        screen.blit(logout_text, logout_rect)
-        
-        leaderboard_hint = small_font.render("按TAB鍵查看排行榜", True, GRAY)
-        leaderboard_rect = leaderboard_hint.get_rect(center=(WINDOW_SIZE[0]//2, 500))
-        screen.blit(leaderboard_hint, leaderboard_rect)
-        
         self.leaderboard.draw(screen)
     
+    def draw_replay_screen(self):
+        self.camera.follow()
+        screen.blit(self.game_background(), (0, 0))
+        self.snake.draw(screen, self.interpolation)
+        self.food.draw(screen)
+        title_text = render_text(fonts.normal, f"重播 {self.time_scale}x  分數: {self.score}", True, YELLOW)
+        screen.blit(title_text, (20, 20))
+        hint_text = render_text(fonts.small, "F鍵切換 1x/8x | ESC鍵結束重播", True, LIGHT_GRAY)
+        screen.blit(hint_text, (20, 60))
+    
+    def draw_screen(self):
+        if self.state == GameState.INTRO:
+            draw = self.draw_intro_screen
+        elif self.state == GameState.LOGIN:
+            draw = self.draw_login_screen
+        elif self.state == GameState.GAME:
+            draw = self.draw_game_screen
+        elif self.state == GameState.GAME_OVER:
+            draw = self.draw_game_over_screen
+        else:
+            draw = self.draw_replay_screen
+        with profiler.section(draw.__name__):
+            draw()
+    
+    def handle_profiler_events(self, event):
+        """F3 開關效能分析疊加層，F4 輸出最近的紀錄"""
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == pygame.K_F3:
+            profiler.toggle()
+            self.last_frame = None  # 疊加層關閉後整個畫面重畫一次
+            return True
+        if event.key == pygame.K_F4 and profiler.enabled:
+            profiler.dump()
+            return True
+        return False
+    
     def run(self):
         clock = pygame.time.Clock()
         running = True
         
         while running:
-            dt = clock.tick(60)
+            dt = clock.tick(RENDER_FPS)
+            profiler.begin_frame()
+            with profiler.section("jobs.poll"):
+                self.jobs.poll()
             
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                
-                if self.state == GameState.INTRO:
-                    self.handle_intro_events(event)
-                elif self.state == GameState.LOGIN:
-                    self.handle_login_events(event)
-                elif self.state == GameState.GAME:
-                    self.handle_game_events(event)
-                elif self.state == GameState.GAME_OVER:
-                    self.handle_game_over_events(event)
+            with profiler.section("events"):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    if self.handle_profiler_events(event):
+                        continue
+                    
+                    if self.state == GameState.INTRO:
+                        self.handle_intro_events(event)
+                    elif self.state == GameState.LOGIN:
+                        self.handle_login_events(event)
+                    elif self.state == GameState.GAME:
+                        self.handle_game_events(event)
+                    elif self.state == GameState.GAME_OVER:
+                        self.handle_game_over_events(event)
+                    elif self.state == GameState.REPLAY:
+                        self.handle_replay_events(event)
             
             # 更新
-            if self.state == GameState.INTRO:
-                self.intro_animation.update()
-                if self.intro_animation.finished:
-                    self.state = GameState.LOGIN
-            elif self.state == GameState.LOGIN:
-                self.username_input.update(dt)
-                self.password_input.update(dt)
-            elif self.state == GameState.GAME:
-                self.update_game()
-
-            if self.state == GameState.INTRO:
-                self.draw_intro_screen()
-            elif self.state == GameState.LOGIN:
-                self.draw_login_screen()
-            elif self.state == GameState.GAME:
-                self.draw_game_screen()
-            elif self.state == GameState.GAME_OVER:
-                self.draw_game_over_screen()
-            
-            pygame.display.flip()
+            with profiler.section("update"):
+                if self.state == GameState.INTRO:
+                    self.intro_animation.update()
+                    if self.intro_animation.finished:
+                        self.state = GameState.LOGIN
+                elif self.state == GameState.LOGIN:
+                    self.username_input.update(dt)
+                    self.password_input.update(dt)
+                elif self.state in (GameState.GAME, GameState.REPLAY):
+                    self.update_game()
+
+            # 畫面種類沒變時，遊戲畫面只更新有變動的矩形
+            frame = (self.state, self.leaderboard.visible)
+            if (DIRTY_RECTS and frame == self.last_frame and
+                    self.state == GameState.GAME and not self.leaderboard.visible):
+                with profiler.section("draw_game_screen_dirty"):
+                    rects = self.draw_game_screen_dirty()
+                if profiler.enabled:
+                    screen.blit(self.game_background(), OVERLAY_RECT, OVERLAY_RECT)
+                    rects.append(profiler.draw(screen, fonts.small))
+                with profiler.section("display"):
+                    if rects:
+                        pygame.display.update(rects)
+            else:
+                self.draw_screen()
+                if profiler.enabled:
+                    profiler.draw(screen, fonts.small)
+                with profiler.section("display"):
+                    pygame.display.flip()
+            self.last_frame = frame
         
+        if profiler.enabled:
+            profiler.dump()
+        self.jobs.shutdown()
+        if api is not None:
+            api.close()
         pygame.quit()
         sys.exit()
 
-if __name__ == "__main__":
+def startup_probe():
+    """啟動到畫出第一幀的各階段耗時，以 JSON 輸出給 measure_startup 使用"""
+    timings = {"import": time.perf_counter() - _IMPORT_START}
+    start = time.perf_counter()
+    init_display()
+    timings["display"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for name in ("big_title", "title", "normal", "small"):
+        fonts.get(name)
+    timings["fonts"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
     game = Game()
-    game.run()
\ No newline at end of file
+    game.draw_screen()
+    pygame.display.flip()
+    timings["first_frame"] = time.perf_counter() - start
+    
+    game.jobs.shutdown()
+    pygame.quit()
+    print(json.dumps(timings))
+
+def measure_startup(runs=3):
+    """分別量測冷啟動（清除字體快取）與熱啟動，每次都啟動新的子程序"""
+    for label, cold in (("冷啟動", True), ("熱啟動", False)):
+        totals = []
+        phases = {}
+        for _ in range(runs):
+            if cold and os.path.exists(FONT_CACHE_FILE):
+                os.remove(FONT_CACHE_FILE)
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), "--startup-probe"],
+                                    capture_output=True, text=True)
+            totals.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                print(result.stderr)
+                return
+            for name, value in json.loads(result.stdout.strip().splitlines()[-1]).items():
+                phases.setdefault(name, []).append(value)
+        
+        detail = ", ".join(f"{name} {min(values) * 1000:.1f}ms" for name, values in phases.items())
+        print(f"{label}: 總計 {min(totals) * 1000:.1f}ms ({detail})")
+
+def play_replay_file(path, speed):
+    try:
+        replay = Replay.load(path)
+    except (OSError, ReplayError) as e:
+        print(f"無法讀取重播檔: {e}")
+        sys.exit(1)
+    if speed == "max":
+        start = time.perf_counter()
+        is_valid, message = verify_replay(replay)
+        elapsed = time.perf_counter() - start
+        print(f"{message}：分數 {replay.score}，{replay.ticks} 步，耗時 {elapsed * 1000:.2f}ms")
+        sys.exit(0 if is_valid else 1)
+    init_display()
+    game = Game()
+    game.start_playback(replay, int(speed))
+    game.run()
+
+def main():
+    parser = argparse.ArgumentParser(description="貪食蛇遊戲系統")
+    parser.add_argument("--startup-time", action="store_true", help="量測冷啟動與熱啟動時間")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--replay", metavar="PATH", help="播放重播檔")
+    parser.add_argument("--speed", choices=["1", "8", "max"], default="1",
+                        help="重播速度，max 表示不開視窗、以最快速度模擬並驗證")
+    args = parser.parse_args()
+    
+    if args.startup_time:
+        measure_startup()
+    elif args.startup_probe:
+        startup_probe()
+    elif args.replay:
+        play_replay_file(args.replay, args.speed)
+    else:
+        init_display()
+        game = Game()
+        game.run()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
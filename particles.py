@@ -0,0 +1,173 @@
+"""開場動畫的粒子特效。
+
+粒子狀態以陣列儲存（每個欄位一個陣列，而不是每個粒子一個 list），
+安裝了 NumPy 時以向量化方式更新，否則逐一更新 array 中的數值。
+繪製時使用 SpritePool 中預先建立好的 Surface，每幀不會配置新的 Surface"""
+import math
+import random
+from array import array
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ALPHA_LEVELS = 16  # 透明度分成 16 階，每種大小與顏色最多只需要 16 個 Surface
+
+
+class SpritePool:
+    """依 (大小, 顏色, 透明度階層) 共用的實心方塊 Surface"""
+
+    def __init__(self):
+        self.surfaces = {}
+
+    def get(self, size, color, alpha):
+        level = min(ALPHA_LEVELS - 1, alpha * ALPHA_LEVELS // 256)
+        key = (size, color, level)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((size, size)).convert()
+            surface.fill(color)
+            surface.set_alpha((level + 1) * 256 // ALPHA_LEVELS - 1)
+            self.surfaces[key] = surface
+        return surface
+
+    def preload(self, sizes, color):
+        for size in sizes:
+            for level in range(ALPHA_LEVELS):
+                self.get(size, color, level * 256 // ALPHA_LEVELS)
+
+
+class IntroParticles:
+    """開場動畫中漂動的蛇身方塊、閃爍的食物與星光"""
+
+    def __init__(self, width, height, colors, snakes=20, foods=10, sparkles=30, seed=None):
+        self.width = width
+        self.height = height
+        self.snake_colors, self.food_color, self.sparkle_color = colors
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed) if np is not None else None
+        self.pool = SpritePool()
+
+        self.snake_x = self._uniform_ints(snakes, 50, width - 50)
+        self.snake_y = self._uniform_ints(snakes, 100, height - 100)
+        self.snake_phase = self._uniform(snakes, 0, 2 * math.pi)
+        self.food_x = self._uniform_ints(foods, 50, width - 50)
+        self.food_y = self._uniform_ints(foods, 100, height - 100)
+        self.food_phase = self._uniform(foods, 0, 1)
+        self.sparkle_x = self._uniform_ints(sparkles, 0, width)
+        self.sparkle_y = self._uniform_ints(sparkles, 0, height)
+        self.sparkle_phase = self._uniform(sparkles, 0, 1)
+        self.sparkle_size = self._uniform(sparkles, 1, 3)
+
+        for color in self.snake_colors:
+            self.pool.preload(range(10, 21), color)
+        self.pool.preload(range(10, 16), self.food_color)
+        self.pool.preload(range(1, 4), self.sparkle_color)
+
+    def _uniform(self, count, low, high):
+        if np is not None:
+            return self.np_rng.uniform(low, high, count)
+        return array('d', (self.rng.uniform(low, high) for _ in range(count)))
+
+    def _uniform_ints(self, count, low, high):
+        if np is not None:
+            return self.np_rng.integers(low, high + 1, count).astype(float)
+        return array('d', (self.rng.randint(low, high) for _ in range(count)))
+
+    def update(self):
+        if np is not None:
+            self._update_numpy()
+        else:
+            self._update_python()
+
+    def _update_numpy(self):
+        self.snake_phase += 0.05
+        self.snake_x += np.cos(self.snake_phase) * 2
+        self.snake_y += np.sin(self.snake_phase)
+        out_x = (self.snake_x < 0) | (self.snake_x > self.width)
+        out_y = (self.snake_y < 0) | (self.snake_y > self.height)
+        self.snake_x[out_x] = self.np_rng.integers(50, self.width - 49, int(out_x.sum()))
+        self.snake_y[out_y] = self.np_rng.integers(100, self.height - 99, int(out_y.sum()))
+
+        self.food_phase += 0.02
+        self.food_phase[self.food_phase > 1] = 0
+
+        self.sparkle_phase += 0.05
+        wrapped = self.sparkle_phase > 1
+        count = int(wrapped.sum())
+        self.sparkle_phase[wrapped] = 0
+        self.sparkle_x[wrapped] = self.np_rng.integers(0, self.width + 1, count)
+        self.sparkle_y[wrapped] = self.np_rng.integers(0, self.height + 1, count)
+
+    def _update_python(self):
+        rng = self.rng
+        for i in range(len(self.snake_phase)):
+            phase = self.snake_phase[i] + 0.05
+            self.snake_phase[i] = phase
+            self.snake_x[i] += math.cos(phase) * 2
+            self.snake_y[i] += math.sin(phase)
+            if self.snake_x[i] < 0 or self.snake_x[i] > self.width:
+                self.snake_x[i] = rng.randint(50, self.width - 50)
+            if self.snake_y[i] < 0 or self.snake_y[i] > self.height:
+                self.snake_y[i] = rng.randint(100, self.height - 100)
+
+        for i in range(len(self.food_phase)):
+            phase = self.food_phase[i] + 0.02
+            self.food_phase[i] = 0 if phase > 1 else phase
+
+        for i in range(len(self.sparkle_phase)):
+            phase = self.sparkle_phase[i] + 0.05
+            if phase > 1:
+                phase = 0
+                self.sparkle_x[i] = rng.randint(0, self.width)
+                self.sparkle_y[i] = rng.randint(0, self.height)
+            self.sparkle_phase[i] = phase
+
+    def draw(self, screen):
+        screen.blits(self.sprites(), doreturn=False)
+
+    def sprites(self):
+        """回傳這一幀要 blit 的 (Surface, 位置) 串列"""
+        if np is not None:
+            snake_alpha = (100 * np.sin(self.snake_phase) ** 2).astype(int).tolist()
+            snake_size = (15 + (5 * np.sin(self.snake_phase * 2)).astype(int)).tolist()
+            food_alpha = (150 * self.food_phase).astype(int).tolist()
+            food_size = (10 + 5 * self.food_phase).astype(int).tolist()
+            sparkle_alpha = (255 * self.sparkle_phase * 2).astype(int).tolist()
+            sparkle_size = self.sparkle_size.astype(int).tolist()
+            snake_x, snake_y = self.snake_x.astype(int).tolist(), self.snake_y.astype(int).tolist()
+            food_x, food_y = self.food_x.astype(int).tolist(), self.food_y.astype(int).tolist()
+            sparkle_x = self.sparkle_x.astype(int).tolist()
+            sparkle_y = self.sparkle_y.astype(int).tolist()
+            sparkle_phase = self.sparkle_phase.tolist()
+        else:
+            snake_alpha = [int(100 * math.sin(p) ** 2) for p in self.snake_phase]
+            snake_size = [15 + int(5 * math.sin(p * 2)) for p in self.snake_phase]
+            food_alpha = [int(150 * p) for p in self.food_phase]
+            food_size = [int(10 + 5 * p) for p in self.food_phase]
+            sparkle_alpha = [int(255 * p * 2) for p in self.sparkle_phase]
+            sparkle_size = [int(s) for s in self.sparkle_size]
+            snake_x, snake_y = [int(v) for v in self.snake_x], [int(v) for v in self.snake_y]
+            food_x, food_y = [int(v) for v in self.food_x], [int(v) for v in self.food_y]
+            sparkle_x = [int(v) for v in self.sparkle_x]
+            sparkle_y = [int(v) for v in self.sparkle_y]
+            sparkle_phase = self.sparkle_phase
+
+        get = self.pool.get
+        sprites = []
+        colors = self.snake_colors
+        for i, alpha in enumerate(snake_alpha):
+            if alpha > 0:
+                sprites.append((get(snake_size[i], colors[i % len(colors)], alpha),
+                                (snake_x[i], snake_y[i])))
+        for i, alpha in enumerate(food_alpha):
+            if alpha > 0:
+                sprites.append((get(food_size[i], self.food_color, alpha), (food_x[i], food_y[i])))
+        for i, phase in enumerate(sparkle_phase):
+            if phase < 0.5 and sparkle_alpha[i] > 0:
+                sprites.append((get(sparkle_size[i], self.sparkle_color, sparkle_alpha[i]),
+                                (sparkle_x[i], sparkle_y[i])))
+        return sprites
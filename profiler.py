@@ -0,0 +1,196 @@
+"""每幀耗時分析：記錄主迴圈各區段（事件、更新、繪製、font.render…）與背景 I/O 的時間，
+在畫面右上角顯示 FPS、幀時間百分位數與各區段成本，並可把最近的紀錄輸出成 CSV 或 JSON。
+
+以 SNAKE_PROFILE=1 啟動或在遊戲中按 F3 開關，F4 輸出紀錄到 SNAKE_PROFILE_TRACE（預設 profile_trace.csv）"""
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import pygame
+
+PROFILE_ENABLED = os.environ.get("SNAKE_PROFILE") == "1"
+TRACE_FILE = os.environ.get("SNAKE_PROFILE_TRACE", "profile_trace.csv")
+HISTORY_FRAMES = 600  # 保留最近的幀數（60 FPS 約 10 秒）
+HITCH_MS = 50  # 超過這個時間的幀另外保存，不會被新的幀擠掉
+OVERLAY_REFRESH = 0.25  # 疊加層文字每隔幾秒更新一次
+OVERLAY_RECT = pygame.Rect(560, 2, 238, 94)
+
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler:
+    """主執行緒以 section() 量測區段；背景執行緒的工作以 timed() 包裝，完成時歸入當時的幀"""
+
+    def __init__(self, enabled=PROFILE_ENABLED, trace_path=TRACE_FILE, history=HISTORY_FRAMES):
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.frames = deque(maxlen=history)
+        self.hitches = deque(maxlen=100)
+        self.background = deque()  # 背景執行緒完成的 (名稱, 秒數, 執行緒名稱)
+        self.frame_index = 0
+        self.frame_start = None
+        self.sections = {}
+        self.overlay = None
+        self.overlay_time = 0.0
+        self._lock = threading.Lock()
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame_start = None
+        self.sections = {}
+        if not self.enabled and self.frames:
+            self.dump()
+
+    def section(self, name):
+        """with profiler.section("update"): ...，停用時幾乎沒有成本"""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def add(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def timed(self, fn, name=None):
+        """包裝要交給背景執行緒的函式，記錄每次呼叫的耗時"""
+        name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.background.append((name, time.perf_counter() - start,
+                                            threading.current_thread().name))
+        return wrapper
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self._finish_frame(now)
+        self.frame_start = now
+        self.sections = {}
+
+    def _finish_frame(self, now):
+        with self._lock:
+            background, self.background = list(self.background), deque()
+        frame = {
+            "frame": self.frame_index,
+            "time": self.frame_start,
+            "frame_ms": (now - self.frame_start) * 1000,
+            "sections": {name: seconds * 1000 for name, seconds in self.sections.items()},
+            "io": [{"name": name, "ms": seconds * 1000, "thread": thread}
+                   for name, seconds, thread in background],
+        }
+        self.frame_index += 1
+        self.frames.append(frame)
+        if frame["frame_ms"] > HITCH_MS:
+            self.hitches.append(frame)
+
+    def summary(self):
+        """最近幀的 FPS、幀時間百分位數與各區段平均成本（毫秒）"""
+        frames = list(self.frames)
+        if not frames:
+            return None
+        times = sorted(f["frame_ms"] for f in frames)
+        totals = {}
+        for frame in frames:
+            for name, ms in frame["sections"].items():
+                totals[name] = totals.get(name, 0.0) + ms
+        def percentile(p):
+            return times[min(len(times) - 1, int(len(times) * p))]
+        return {
+            "fps": 1000 * len(times) / sum(times),
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": times[-1],
+            "sections": sorted(((name, total / len(frames)) for name, total in totals.items()),
+                               key=lambda item: -item[1]),
+        }
+
+    def draw(self, screen, font):
+        """在右上角畫出疊加層，回傳需要更新到螢幕的矩形"""
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time >= OVERLAY_REFRESH:
+            self.overlay = self._build_overlay(font)
+            self.overlay_time = now
+        screen.blit(self.overlay, OVERLAY_RECT)
+        return OVERLAY_RECT
+
+    def _build_overlay(self, font):
+        surface = pygame.Surface(OVERLAY_RECT.size)
+        surface.fill((0, 0, 0))
+        surface.set_alpha(200)
+        stats = self.summary()
+        if stats is None:
+            lines = ["收集中…"]
+        else:
+            lines = [f"FPS {stats['fps']:.0f}  max {stats['max']:.1f}ms",
+                     f"p50 {stats['p50']:.1f} p95 {stats['p95']:.1f} p99 {stats['p99']:.1f}"]
+            lines += [f"{name[:18]} {ms:.2f}ms" for name, ms in stats["sections"][:3]]
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, True, (0, 255, 0)), (6, 2 + i * 18))
+        return surface
+
+    def dump(self, path=None):
+        """把最近的幀與較慢的幀輸出成 CSV（預設）或 JSON（副檔名為 .json），回傳檔案路徑"""
+        path = path or self.trace_path
+        frames = {f["frame"]: f for f in self.hitches}
+        frames.update((f["frame"], f) for f in self.frames)
+        frames = [frames[index] for index in sorted(frames)]
+        try:
+            if path.endswith(".json"):
+                with open(path, "w", encoding='utf-8') as f:
+                    json.dump({"hitch_ms": HITCH_MS, "frames": frames}, f, ensure_ascii=False)
+            else:
+                names = sorted({name for frame in frames for name in frame["sections"]})
+                with open(path, "w", newline="", encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["frame", "time", "frame_ms"] + names + ["io"])
+                    for frame in frames:
+                        io = ";".join(f"{e['name']}={e['ms']:.2f}@{e['thread']}" for e in frame["io"])
+                        writer.writerow([frame["frame"], f"{frame['time']:.6f}", f"{frame['frame_ms']:.3f}"] +
+                                        [f"{frame['sections'].get(name, 0.0):.3f}" for name in names] + [io])
+        except OSError as e:
+            print(f"無法寫入效能紀錄: {e}")
+            return None
+        print(f"效能紀錄已寫入 {path}（{len(frames)} 幀）")
+        return path
+
+
+profiler = FrameProfiler()
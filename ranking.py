@@ -0,0 +1,132 @@
+import bisect
+
+_LOAD = 512  # 區塊的目標長度，超過兩倍時分成兩塊
+
+
+class ScoreIndex:
+    """依分數排序的索引，維護 (-分數, 用戶名) 的有序序列，不必每次重新排序所有用戶。
+
+    序列切成長度約 _LOAD 的區塊，_maxes 是每個區塊的最後一個鍵，_tree 是各區塊長度的
+    Fenwick 樹。更新時先二分搜尋找到區塊，區塊內的插入或刪除只搬動 O(_LOAD) 個元素；
+    查名次時以 Fenwick 樹加總前面區塊的長度，為 O(log n)。只有區塊分裂或清空時才重建 Fenwick 樹"""
+
+    def __init__(self, scores=None):
+        self._scores = dict(scores) if scores else {}
+        keys = sorted((-score, name) for name, score in self._scores.items())
+        self._blocks = [keys[i:i + _LOAD] for i in range(0, len(keys), _LOAD)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(keys)
+        self._build_tree()
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, username):
+        return username in self._scores
+
+    def set(self, username, score):
+        """新增或更新用戶分數"""
+        old_score = self._scores.get(username)
+        if old_score == score:
+            return
+        if old_score is not None:
+            self._remove_key((-old_score, username))
+        self._scores[username] = score
+        self._insert_key((-score, username))
+
+    def remove(self, username):
+        old_score = self._scores.pop(username, None)
+        if old_score is not None:
+            self._remove_key((-old_score, username))
+
+    def _build_tree(self):
+        tree = [0] * (len(self._blocks) + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, block_index, delta):
+        i = block_index + 1
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _count_before(self, block_index):
+        """前 block_index 個區塊的元素總數"""
+        total = 0
+        i = block_index
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _insert_key(self, key):
+        self._len += 1
+        if not self._blocks:
+            self._blocks = [[key]]
+            self._maxes = [key]
+            self._build_tree()
+            return
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._blocks):
+            i -= 1
+        block = self._blocks[i]
+        bisect.insort(block, key)
+        self._maxes[i] = block[-1]
+        if len(block) > 2 * _LOAD:
+            half = block[_LOAD:]
+            del block[_LOAD:]
+            self._blocks.insert(i + 1, half)
+            self._maxes[i] = block[-1]
+            self._maxes.insert(i + 1, half[-1])
+            self._build_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def _remove_key(self, key):
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._blocks):
+            return
+        block = self._blocks[i]
+        j = bisect.bisect_left(block, key)
+        if j == len(block) or block[j] != key:
+            return
+        del block[j]
+        self._len -= 1
+        if block:
+            self._maxes[i] = block[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+            self._build_tree()
+
+    def top(self, k):
+        """前 k 名，回傳 [(username, score), ...]"""
+        result = []
+        for block in self._blocks:
+            for neg_score, name in block[:k - len(result)]:
+                result.append((name, -neg_score))
+            if len(result) >= k:
+                break
+        return result
+
+    def rank(self, username):
+        """用戶名次（同分同名次），用戶不存在時回傳 None"""
+        score = self._scores.get(username)
+        if score is None:
+            return None
+        return self.count_above(score) + 1
+
+    def count_above(self, score):
+        """分數高於 score 的人數"""
+        key = (-score, "")
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._blocks):
+            return self._len
+        return self._count_before(i) + bisect.bisect_left(self._blocks[i], key)
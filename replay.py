@@ -0,0 +1,214 @@
+"""遊戲重播的記錄、儲存與驗證。
+
+重播檔只記錄重新模擬所需的資料：亂數種子、棋盤大小、速度變化規則，
+以及每一步移動後蛇的方向（4 種方向各佔 2 位元，每個位元組存 4 步）。
+SnakeEngine 在相同種子與操作下結果必定相同，因此伺服器或本機存檔前
+可以重新模擬一次，分數對不上就拒絕寫入 users.json。
+
+    python replay.py verify replays/*.snkr
+"""
+import argparse
+import base64
+import os
+import struct
+import sys
+import time
+from array import array
+
+from engine import (SnakeEngine, StepResult, DIRECTIONS, GRID_WIDTH, GRID_HEIGHT,
+                    INITIAL_SPEED, SPEED_STEP, MAX_SPEED, FOOD_SCORE)
+
+MAGIC = b"SNKR"
+VERSION = 1
+# 檔頭：標記、版本、種子、寬、高、起始速度、每次加速、最高速度、分數、步數
+HEADER = struct.Struct("<4sBIHHfffII")
+REPLAY_DIR = os.environ.get("SNAKE_REPLAY_DIR", "replays")
+MAX_TICKS = 10_000_000  # 拒絕步數不合理的檔案，避免驗證時耗盡記憶體
+MAX_CELLS = 4_000_000  # 棋盤格數上限（2000x2000），驗證時建立引擎約需 50MB
+
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+# 每個位元組解開成 4 步的方向代碼
+_UNPACK_TABLE = [bytes((byte >> shift) & 3 for shift in (0, 2, 4, 6)) for byte in range(256)]
+
+
+class ReplayError(ValueError):
+    """重播檔格式錯誤"""
+
+
+class Replay:
+    """一局遊戲的重播，codes 為每一步的方向代碼（DIRECTIONS 的索引）"""
+
+    def __init__(self, seed, width, height, initial_speed, speed_step, max_speed,
+                 codes=None, score=0):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.initial_speed = initial_speed
+        self.speed_step = speed_step
+        self.max_speed = max_speed
+        self.codes = codes if codes is not None else bytearray()
+        self.score = score
+
+    @classmethod
+    def start(cls, engine):
+        """在 engine.reset() 之後呼叫，開始記錄這一局"""
+        return cls(engine.seed, engine.width, engine.height,
+                   engine.initial_speed, engine.speed_step, engine.max_speed)
+
+    @property
+    def ticks(self):
+        return len(self.codes)
+
+    def record(self, engine):
+        """每次 step() 之後呼叫，記下蛇目前的方向與分數"""
+        self.codes.append(DIRECTION_CODES[engine.direction])
+        self.score = engine.score
+
+    def create_engine(self):
+        return SnakeEngine(self.width, self.height, self.seed,
+                           self.initial_speed, self.speed_step, self.max_speed)
+
+    def actions(self):
+        return [DIRECTIONS[code] for code in self.codes]
+
+    def to_bytes(self):
+        codes = self.codes + bytes(-len(self.codes) % 4)
+        packed = array('B', (codes[i] | codes[i + 1] << 2 | codes[i + 2] << 4 | codes[i + 3] << 6
+                             for i in range(0, len(codes), 4)))
+        header = HEADER.pack(MAGIC, VERSION, self.seed, self.width, self.height,
+                             self.initial_speed, self.speed_step, self.max_speed,
+                             self.score, self.ticks)
+        return header + packed.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("重播檔長度不足")
+        (magic, version, seed, width, height, initial_speed, speed_step, max_speed,
+         score, ticks) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError("不是可辨識的重播檔")
+        if ticks > MAX_TICKS or len(data) - HEADER.size != (ticks + 3) // 4:
+            raise ReplayError("重播檔步數與內容不符")
+        if width < 1 or height < 1 or initial_speed <= 0:
+            raise ReplayError("重播檔參數錯誤")
+        if width * height > MAX_CELLS:
+            raise ReplayError("重播檔的棋盤過大")
+        codes = bytearray(b"".join(_UNPACK_TABLE[byte] for byte in data[HEADER.size:]))
+        del codes[ticks:]
+        return cls(seed, width, height, initial_speed, speed_step, max_speed, codes, score)
+
+    def to_text(self):
+        """以 base64 字串表示，方便放進 JSON 請求"""
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def from_text(cls, text):
+        try:
+            data = base64.b64decode(text, validate=True)
+        except (ValueError, TypeError):
+            raise ReplayError("重播資料不是合法的 base64")
+        return cls.from_bytes(data)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def simulate(replay):
+    """以最快速度重新模擬，回傳 (結束時的引擎, 實際執行的步數)"""
+    engine = replay.create_engine()
+    step = engine.step
+    finished = (StepResult.DIED, StepResult.WON)
+    steps = 0
+    for action in replay.actions():
+        steps += 1
+        if step(action) in finished:
+            break
+    return engine, steps
+
+
+def _float32(value):
+    """檔頭以 32 位元浮點數記錄速度，比較前先把規則轉成相同精度"""
+    return struct.unpack("<f", struct.pack("<f", value))[0]
+
+
+def max_ticks_for(score, width, height):
+    """分數 score 的一局合理的最多步數：每吃一個食物（以及最後撞死前）最多走過整個棋盤一次。
+    食物數不會超過格數，40x25 棋盤最多約 1M 步"""
+    cells = width * height
+    return (min(score // FOOD_SCORE, cells) + 1) * cells
+
+
+def check_rules(replay, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """確認重播使用排行榜接受的棋盤大小與速度規則，且步數在分數的合理範圍內，
+    不符合的重播不必重新模擬。回傳 (是否符合, 訊息)"""
+    if (replay.width, replay.height) != (width, height):
+        return False, f"排行榜只接受 {width}x{height} 的棋盤"
+    speeds = (replay.initial_speed, replay.speed_step, replay.max_speed)
+    if speeds != tuple(_float32(value) for value in (INITIAL_SPEED, SPEED_STEP, MAX_SPEED)):
+        return False, "重播的速度規則與排行榜不同"
+    if replay.ticks > max_ticks_for(replay.score, width, height):
+        return False, "重播步數超過這個分數的合理範圍"
+    return True, "符合排行榜規則"
+
+
+def verify_replay(replay, score=None):
+    """重新模擬並確認分數，回傳 (是否通過, 訊息)；score 為 None 時使用檔頭記錄的分數"""
+    claimed = replay.score if score is None else score
+    if claimed != replay.score:
+        return False, "提交的分數與重播紀錄不符"
+    engine, steps = simulate(replay)
+    if engine.alive:
+        return False, "重播紀錄沒有在遊戲結束時停止"
+    if steps != replay.ticks:
+        return False, "重播紀錄在遊戲結束後仍有操作"
+    if engine.score != claimed:
+        return False, f"重播結果分數為 {engine.score}，與提交的 {claimed} 不符"
+    return True, "重播驗證通過"
+
+
+def save_replay(username, replay, directory=None):
+    """保存通過驗證的重播，供事後稽核，回傳檔案路徑"""
+    directory = directory or REPLAY_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{username}-{replay.score}-{replay.seed}.snkr")
+    try:
+        replay.save(path)
+    except OSError as e:
+        print(f"無法保存重播: {e}")
+        return None
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="貪食蛇重播工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    verify = sub.add_parser("verify", help="重新模擬重播檔並檢查分數")
+    verify.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        failed = 0
+        start = time.perf_counter()
+        for path in args.paths:
+            try:
+                ok, message = verify_replay(Replay.load(path))
+            except (OSError, ReplayError) as e:
+                ok, message = False, str(e)
+            if not ok:
+                failed += 1
+                print(f"{path}: {message}")
+        elapsed = time.perf_counter() - start
+        print(f"驗證 {len(args.paths)} 個重播，{failed} 個失敗，"
+              f"{len(args.paths) / max(elapsed, 1e-9):.0f} 局/秒")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
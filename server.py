@@ -0,0 +1,240 @@
+import argparse
+import json
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import auth
+from replay import Replay, ReplayError, check_rules, verify_replay, save_replay
+
+SESSION_TTL = 24 * 3600  # token 閒置超過這個秒數就失效
+# 請求內容上限：40x25 棋盤滿分的重播約 1M 步，base64 後約 333KB
+MAX_BODY_BYTES = 512 * 1024
+
+
+class SessionTable:
+    """登入後發給客戶端的 token 與用戶名的對應。
+
+    每個用戶只有一個 token，重複登入時沿用並延長期限；閒置超過 ttl 秒的 token 失效，
+    並在登入時定期清除，數量不會隨登入次數增加"""
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._sessions = {}  # token -> [用戶名, 到期時間]
+        self._tokens = {}  # 用戶名 -> token
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def create(self, username):
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            token = self._tokens.get(username)
+            session = self._sessions.get(token)
+            if session is None or session[1] <= now:
+                self._sessions.pop(token, None)
+                token = secrets.token_hex(16)
+                self._tokens[username] = token
+                session = self._sessions[token] = [username, 0.0]
+            session[1] = now + self.ttl
+            return token
+
+    def get(self, token):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if session[1] <= now:
+                self._remove(token)
+                return None
+            session[1] = now + self.ttl
+            return session[0]
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _remove(self, token):
+        username, _ = self._sessions.pop(token)
+        if self._tokens.get(username) == token:
+            del self._tokens[username]
+
+    def _sweep(self, now):
+        for token in [token for token, (_, expires) in self._sessions.items() if expires <= now]:
+            self._remove(token)
+        self._next_sweep = now + self.ttl / 10
+
+
+class ScoreRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 才會保持連線，讓客戶端重複使用同一條 TCP 連線
+    protocol_version = "HTTP/1.1"
+    # 標頭與內容分兩次寫出，關閉 Nagle 以免 keep-alive 連線卡在延遲 ACK
+    disable_nagle_algorithm = True
+    sessions = SessionTable()
+    quiet = False
+    allow_unverified = False  # 是否接受沒有附上重播紀錄的分數（只供測試）
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def content_length(self):
+        """Content-Length 的值，缺少時為 0，不是非負整數時回傳 None"""
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            return None
+        return length if length >= 0 else None
+
+    def read_json(self, length):
+        if length == 0:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    @staticmethod
+    def credentials(data):
+        """取出用戶名與密碼，任一欄位不是字串時回傳 None"""
+        username = data.get("username", "")
+        password = data.get("password", "")
+        if not isinstance(username, str) or not isinstance(password, str):
+            return None
+        return username, password
+
+    def current_user(self):
+        header = self.headers.get("Authorization", "")
+        if not header.startswith("Bearer "):
+            return None
+        return self.sessions.get(header[len("Bearer "):])
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/leaderboard":
+            query = parse_qs(url.query)
+            try:
+                limit = max(1, min(int(query.get("limit", ["5"])[0]), 100))
+            except ValueError:
+                limit = 5
+            players = [{"username": name, "high_score": data["high_score"]}
+                       for name, data in auth.get_top_players(limit)]
+            self.send_json(200, {"players": players})
+        elif url.path == "/me":
+            username = self.current_user()
+            if username is None:
+                self.send_json(401, {"success": False, "message": "請先登入"})
+                return
+            self.send_json(200, {"success": True, "username": username,
+                                 "user": auth.get_user_info(username),
+                                 "rank": auth.get_rank(username)})
+        else:
+            self.send_json(404, {"success": False, "message": "找不到此路徑"})
+
+    def do_POST(self):
+        length = self.content_length()
+        if length is not None and length > MAX_BODY_BYTES:
+            # 沒有讀取內容，這條連線不能再用
+            self.close_connection = True
+            self.send_json(413, {"success": False, "message": "請求內容過大"})
+            return
+        data = self.read_json(length) if length is not None else None
+        if data is None:
+            self.send_json(400, {"success": False, "message": "請求格式錯誤"})
+            return
+
+        path = urlparse(self.path).path
+        if path in ("/register", "/login"):
+            credentials = self.credentials(data)
+            if credentials is None:
+                self.send_json(400, {"success": False, "message": "用戶名和密碼必須是字串"})
+                return
+            username, password = credentials
+
+        if path == "/register":
+            success, message = auth.register_user(username, password)
+            self.send_json(200 if success else 400, {"success": success, "message": message})
+        elif path == "/login":
+            success, message = auth.login_user(username, password)
+            if not success:
+                self.send_json(401, {"success": False, "message": message})
+                return
+            self.send_json(200, {"success": True, "message": message,
+                                 "token": self.sessions.create(username),
+                                 "user": auth.get_user_info(username)})
+        elif path == "/score":
+            username = self.current_user()
+            if username is None:
+                self.send_json(401, {"success": False, "message": "請先登入"})
+                return
+            score = data.get("score")
+            if isinstance(score, bool) or not isinstance(score, int):
+                self.send_json(400, {"success": False, "message": "分數格式錯誤"})
+                return
+            replay = None
+            if "replay" in data:
+                try:
+                    replay = Replay.from_text(str(data["replay"]))
+                except ReplayError as e:
+                    self.send_json(400, {"success": False, "message": str(e)})
+                    return
+                is_valid, message = check_rules(replay)
+                if is_valid:
+                    is_valid, message = verify_replay(replay, score)
+                if not is_valid:
+                    self.send_json(400, {"success": False, "message": message})
+                    return
+            elif not self.allow_unverified:
+                self.send_json(400, {"success": False, "message": "缺少重播紀錄"})
+                return
+            updated = auth.update_high_score(username, score)
+            if updated and replay is not None:
+                save_replay(username, replay)
+            self.send_json(200, {"success": True, "updated": updated,
+                                 "rank": auth.get_rank(username)})
+        else:
+            self.send_json(404, {"success": False, "message": "找不到此路徑"})
+
+
+def create_server(host="127.0.0.1", port=8000, quiet=False, allow_unverified=False):
+    ScoreRequestHandler.quiet = quiet
+    ScoreRequestHandler.allow_unverified = allow_unverified
+    server = ThreadingHTTPServer((host, port), ScoreRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="貪食蛇帳號與排行榜 HTTP 服務")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--quiet", action="store_true", help="不輸出每個請求的紀錄")
+    parser.add_argument("--allow-unverified", action="store_true",
+                        help="也接受沒有附上重播紀錄的分數（預設只接受重新模擬後相符的成績）")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.quiet, args.allow_unverified)
+    print(f"伺服器啟動於 http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        auth.get_store().flush()
+
+
+if __name__ == "__main__":
+    main()
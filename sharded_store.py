@@ -0,0 +1,123 @@
+"""依用戶名的雜湊把用戶分散到多個儲存後端（JSON 檔或 SQLite 資料庫）。
+
+每個分片是獨立的 UserStore 或 SQLiteUserStore，各自載入、各自上鎖，
+查詢與修改單一用戶只會碰到一個分片；排行榜由各分片的前 K 名合併而成，
+名次則是各分片中分數更高的人數加總。
+
+    python sharded_store.py --shards 8            # 把 users.json 拆成 users-0.json ... users-7.json
+    python sharded_store.py --shards 8 --backend sqlite
+"""
+import argparse
+import heapq
+import os
+import zlib
+
+
+def shard_index(username, count):
+    """以 CRC32 決定用戶所在的分片，不受 Python 的雜湊隨機化影響"""
+    return zlib.crc32(username.encode("utf-8")) % count
+
+
+def shard_path(path, index):
+    root, ext = os.path.splitext(path)
+    return f"{root}-{index}{ext}"
+
+
+class ShardedUserStore:
+    """介面與 auth.UserStore 相同，內部把每個用戶交給固定的一個分片處理"""
+
+    def __init__(self, shards):
+        self.shards = list(shards)
+
+    def shard_for(self, username):
+        return self.shards[shard_index(username, len(self.shards))]
+
+    def get(self, username):
+        return self.shard_for(username).get(username)
+
+    def exists(self, username):
+        return self.shard_for(username).exists(username)
+
+    def add(self, username, record):
+        return self.shard_for(username).add(username, record)
+
+    def update(self, username, **fields):
+        return self.shard_for(username).update(username, **fields)
+
+    def raise_high_score(self, username, score):
+        return self.shard_for(username).raise_high_score(username, score)
+
+    def delete(self, username):
+        return self.shard_for(username).delete(username)
+
+    def all(self):
+        users = {}
+        for shard in self.shards:
+            users.update(shard.all())
+        return users
+
+    def replace_all(self, users):
+        parts = [{} for _ in self.shards]
+        for username, data in users.items():
+            parts[shard_index(username, len(self.shards))][username] = data
+        for shard, part in zip(self.shards, parts):
+            shard.replace_all(part)
+
+    def top(self, limit=5):
+        """合併各分片的前 limit 名，排序方式與單一分片相同（分數高者優先，同分依用戶名）"""
+        merged = heapq.merge(*(shard.top(limit) for shard in self.shards),
+                             key=lambda item: (-item[1]["high_score"], item[0]))
+        return [item for item, _ in zip(merged, range(limit))]
+
+    def rank(self, username):
+        user = self.get(username)
+        if user is None:
+            return None
+        return self.count_above(user.get("high_score", 0)) + 1
+
+    def count_above(self, score):
+        return sum(shard.count_above(score) for shard in self.shards)
+
+    def flush(self):
+        results = [shard.flush() for shard in self.shards]
+        return all(results)
+
+    def reload(self):
+        for shard in self.shards:
+            shard.reload()
+
+    def close(self):
+        for shard in self.shards:
+            if hasattr(shard, "close"):
+                shard.close()
+
+
+def create_sharded_store(count, backend="json", path=None):
+    """建立 count 個分片，JSON 分片為 users-0.json…，SQLite 分片為 users-0.db…"""
+    if backend == "sqlite":
+        from sqlite_store import SQLiteUserStore, DB_FILE
+        return ShardedUserStore(SQLiteUserStore(shard_path(path or DB_FILE, i)) for i in range(count))
+    from auth import UserStore, USER_FILE
+    return ShardedUserStore(UserStore(shard_path(path or USER_FILE, i)) for i in range(count))
+
+
+def split_users(count, backend="json", source=None):
+    """把單一 users.json（含日誌）的用戶分配到各分片，回傳搬移的用戶數"""
+    from auth import UserStore, USER_FILE
+    users = UserStore(source or USER_FILE).all()
+    store = create_sharded_store(count, backend)
+    try:
+        store.replace_all(users)
+        store.flush()
+    finally:
+        store.close()
+    return len(users)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="把 users.json 拆成多個分片")
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    args = parser.parse_args()
+    moved = split_users(args.shards, args.backend)
+    print(f"已將 {moved} 位用戶分配到 {args.shards} 個分片，以 SNAKE_SHARDS={args.shards} 啟動即可使用")
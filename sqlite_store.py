@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+
+DB_FILE = "users.db"
+FIELDS = ("password", "high_score")
+
+# score_counts 記錄每個分數有幾位用戶，由觸發器在修改 users 的同一個交易中維護
+_SCORE_COUNT_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS users_score_insert AFTER INSERT ON users BEGIN"
+    " INSERT INTO score_counts (high_score, count) VALUES (NEW.high_score, 1)"
+    " ON CONFLICT (high_score) DO UPDATE SET count = count + 1;"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS users_score_delete AFTER DELETE ON users BEGIN"
+    " UPDATE score_counts SET count = count - 1 WHERE high_score = OLD.high_score;"
+    " DELETE FROM score_counts WHERE high_score = OLD.high_score AND count = 0;"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS users_score_update AFTER UPDATE OF high_score ON users"
+    " WHEN OLD.high_score IS NOT NEW.high_score BEGIN"
+    " UPDATE score_counts SET count = count - 1 WHERE high_score = OLD.high_score;"
+    " DELETE FROM score_counts WHERE high_score = OLD.high_score AND count = 0;"
+    " INSERT INTO score_counts (high_score, count) VALUES (NEW.high_score, 1)"
+    " ON CONFLICT (high_score) DO UPDATE SET count = count + 1;"
+    " END",
+)
+
+
+class SQLiteUserStore:
+    """以 SQLite 儲存用戶資料，介面與 auth.UserStore 相同。
+
+    名次由 score_counts（每個分數的人數）加總比該分數高的各列而來，成本與比它高的
+    「不同分數」數量成正比；分數是食物分數的倍數，種類遠少於用戶數，與用戶數無關"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " username TEXT PRIMARY KEY,"
+            " password TEXT NOT NULL,"
+            " high_score INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_users_high_score ON users (high_score DESC)"
+        )
+        has_counts = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'score_counts'"
+        ).fetchone()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS score_counts ("
+            " high_score NUMERIC PRIMARY KEY,"
+            " count INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        if not has_counts:
+            # 舊版建立的資料庫沒有 score_counts，依現有用戶建立一次
+            self._conn.execute(
+                "INSERT INTO score_counts (high_score, count)"
+                " SELECT high_score, COUNT(*) FROM users GROUP BY high_score"
+            )
+        for trigger in _SCORE_COUNT_TRIGGERS:
+            self._conn.execute(trigger)
+        self._conn.commit()
+
+    @staticmethod
+    def _record(row):
+        return {"password": row[0], "high_score": row[1]}
+
+    def get(self, username):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT password, high_score FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def exists(self, username):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return row is not None
+
+    def add(self, username, record):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT INTO users (username, password, high_score) VALUES (?, ?, ?)",
+                        (username, record["password"], record.get("high_score", 0)),
+                    )
+            except sqlite3.IntegrityError:
+                return False
+        return True
+
+    def update(self, username, **fields):
+        columns = [name for name in fields if name in FIELDS]
+        if not columns:
+            return self.exists(username)
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        values = [fields[name] for name in columns]
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE users SET {assignments} WHERE username = ?", (*values, username)
+            )
+        return cursor.rowcount > 0
+
+    def raise_high_score(self, username, score):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE users SET high_score = ? WHERE username = ? AND high_score < ?",
+                (score, username, score),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, username):
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM users WHERE username = ?", (username,))
+        return cursor.rowcount > 0
+
+    def all(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT username, password, high_score FROM users"
+            ).fetchall()
+        return {row[0]: self._record(row[1:]) for row in rows}
+
+    def replace_all(self, users):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM users")
+            self._insert_many(users)
+
+    def _insert_many(self, users):
+        # INSERT OR REPLACE 刪除舊列時不會觸發 DELETE 觸發器，改用 UPSERT 維持 score_counts
+        self._conn.executemany(
+            "INSERT INTO users (username, password, high_score) VALUES (?, ?, ?)"
+            " ON CONFLICT (username) DO UPDATE SET"
+            " password = excluded.password, high_score = excluded.high_score",
+            ((name, data["password"], data.get("high_score", 0)) for name, data in users.items()),
+        )
+
+    def top(self, limit=5):
+        """依最高分排序取前 limit 名，使用 high_score 索引"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT username, password, high_score FROM users"
+                " ORDER BY high_score DESC, username LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row[0], {"high_score": row[2]}) for row in rows]
+
+    def rank(self, username):
+        """用戶名次（同分同名次）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_score FROM users WHERE username = ?", (username,)
+            ).fetchone()
+            return self.count_above(row[0]) + 1 if row else None
+
+    def count_above(self, score):
+        """分數高於 score 的人數，加總 score_counts 中比 score 高的各列"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM score_counts WHERE high_score > ?", (score,)
+            ).fetchone()
+        return row[0]
+
+    def flush(self):
+        # 每次修改都已經在交易中提交
+        return True
+
+    def reload(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_from_json(json_path="users.json", db_path=DB_FILE):
+    """將 users.json 的資料一次匯入 SQLite，回傳匯入的用戶數"""
+    if not os.path.exists(json_path):
+        return 0
+    # 透過 UserStore 讀取，才會包含尚未合併回快照的日誌記錄
+    from auth import UserStore
+    users = UserStore(json_path).all()
+
+    store = SQLiteUserStore(db_path)
+    try:
+        with store._lock, store._conn:
+            store._insert_many(users)
+    finally:
+        store.close()
+    return len(users)
+
+
+if __name__ == "__main__":
+    count = migrate_from_json()
+    print(f"已匯入 {count} 位用戶到 {DB_FILE}")
@@ -0,0 +1,164 @@
+"""以多個行程同時執行 bots.py 中的策略，統計每個策略的分數分布、遊戲長度與各行程的吞吐量，
+並把每個策略的最佳成績寫入排行榜（以 bot- 開頭的帳號）。
+
+    python tournament.py --games 200 --workers 4
+    python tournament.py --policies greedy bfs --games 100 --scaling
+"""
+import argparse
+import multiprocessing
+import os
+import secrets
+import statistics
+import time
+
+import auth
+from bots import POLICIES, create_policy
+from engine import SnakeEngine, GRID_WIDTH, GRID_HEIGHT
+
+BOT_PREFIX = "bot-"
+CHUNK_SIZE = 5  # 每個工作包含的局數
+MAX_TICKS = 1_000_000  # 單局步數上限，避免策略原地繞圈時無法結束
+
+
+def play_game(policy_name, seed, width, height, max_ticks):
+    engine = SnakeEngine(width, height, seed)
+    policy = create_policy(policy_name, width, height)
+    step = engine.step
+    while engine.alive and engine.ticks < max_ticks:
+        step(policy(engine))
+    return {"score": engine.score, "ticks": engine.ticks, "won": engine.won,
+            "timeout": engine.alive}
+
+
+def run_chunk(task):
+    """在子行程中執行一批局數，回傳 (策略, 行程編號, 結果串列, 耗時)"""
+    policy_name, seeds, width, height, max_ticks = task
+    start = time.perf_counter()
+    results = [play_game(policy_name, seed, width, height, max_ticks) for seed in seeds]
+    return policy_name, os.getpid(), results, time.perf_counter() - start
+
+
+def run_tournament(policies, games, workers, width=GRID_WIDTH, height=GRID_HEIGHT,
+                   max_ticks=MAX_TICKS, seed=0):
+    """回傳 (各策略的結果, 各行程的統計, 總耗時)；每個策略使用相同的種子"""
+    tasks = []
+    for name in policies:
+        for first in range(0, games, CHUNK_SIZE):
+            seeds = range(seed + first, seed + min(first + CHUNK_SIZE, games))
+            tasks.append((name, list(seeds), width, height, max_ticks))
+
+    results = {name: [] for name in policies}
+    worker_stats = {}
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for name, pid, chunk, elapsed in pool.imap_unordered(run_chunk, tasks):
+            results[name].extend(chunk)
+            stats = worker_stats.setdefault(pid, {"games": 0, "ticks": 0, "seconds": 0.0})
+            stats["games"] += len(chunk)
+            stats["ticks"] += sum(r["ticks"] for r in chunk)
+            stats["seconds"] += elapsed
+    return results, worker_stats, time.perf_counter() - start
+
+
+def summarize(results):
+    scores = sorted(r["score"] for r in results)
+    ticks = [r["ticks"] for r in results]
+    return {
+        "games": len(results),
+        "mean": statistics.mean(scores),
+        "median": statistics.median(scores),
+        "p90": scores[min(len(scores) - 1, int(len(scores) * 0.9))],
+        "max": scores[-1],
+        "mean_ticks": statistics.mean(ticks),
+        "won": sum(r["won"] for r in results),
+        "timeout": sum(r["timeout"] for r in results),
+    }
+
+
+def submit_results(results):
+    """把每個策略的最高分寫入 auth.py 使用的排行榜，帳號不存在時自動建立"""
+    for name, games in results.items():
+        username = BOT_PREFIX + name
+        if not auth.get_store().exists(username):
+            success, message = auth.register_user(username, secrets.token_urlsafe(16))
+            if not success:
+                print(f"無法建立機器人帳號 {username}: {message}")
+                continue
+        best = max(r["score"] for r in games)
+        if auth.update_high_score(username, best):
+            print(f"{username} 新的最高分: {best}")
+    auth.get_store().flush()
+
+
+def print_report(results, worker_stats, elapsed):
+    print(f"{'策略':<12} {'局數':>6} {'平均':>8} {'中位數':>8} {'p90':>6} {'最高':>6} "
+          f"{'平均步數':>10} {'通關':>5} {'逾時':>5}")
+    for name, games in results.items():
+        s = summarize(games)
+        print(f"{name:<12} {s['games']:>6} {s['mean']:>8.1f} {s['median']:>8.1f} {s['p90']:>6} "
+              f"{s['max']:>6} {s['mean_ticks']:>10.0f} {s['won']:>5} {s['timeout']:>5}")
+
+    print(f"\n{'行程':>8} {'局數':>6} {'局/秒':>8} {'步/秒':>12}")
+    for pid, stats in sorted(worker_stats.items()):
+        seconds = max(stats["seconds"], 1e-9)
+        print(f"{pid:>8} {stats['games']:>6} {stats['games'] / seconds:>8.1f} "
+              f"{stats['ticks'] / seconds:>12,.0f}")
+    total_games = sum(stats["games"] for stats in worker_stats.values())
+    total_ticks = sum(stats["ticks"] for stats in worker_stats.values())
+    print(f"總計 {total_games} 局，{elapsed:.2f} 秒，{total_games / elapsed:.1f} 局/秒，"
+          f"{total_ticks / elapsed:,.0f} 步/秒")
+
+
+def measure_scaling(policies, games, max_workers, width, height, max_ticks):
+    """以 1、2、4…個行程執行相同的工作，比較總吞吐量"""
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+
+    baseline = None
+    print(f"{'行程數':>6} {'秒':>8} {'步/秒':>12} {'加速':>6} {'效率':>6}")
+    for workers in counts:
+        results, _, elapsed = run_tournament(policies, games, workers, width, height, max_ticks)
+        ticks = sum(r["ticks"] for games_ in results.values() for r in games_)
+        rate = ticks / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>6} {elapsed:>8.2f} {rate:>12,.0f} {rate / baseline:>6.2f} "
+              f"{rate / baseline / workers:>6.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="貪食蛇機器人錦標賽")
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=sorted(POLICIES))
+    parser.add_argument("--games", type=int, default=50, help="每個策略的局數")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--width", type=int, default=GRID_WIDTH)
+    parser.add_argument("--height", type=int, default=GRID_HEIGHT)
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scaling", action="store_true", help="比較不同行程數的吞吐量")
+    parser.add_argument("--no-submit", action="store_true", help="不寫入排行榜")
+    args = parser.parse_args()
+
+    if args.scaling:
+        measure_scaling(args.policies, args.games, args.workers, args.width, args.height,
+                        args.max_ticks)
+        return
+
+    results, worker_stats, elapsed = run_tournament(args.policies, args.games, args.workers,
+                                                    args.width, args.height, args.max_ticks,
+                                                    args.seed)
+    print_report(results, worker_stats, elapsed)
+    if args.no_submit:
+        return
+    if (args.width, args.height) != (GRID_WIDTH, GRID_HEIGHT):
+        # 排行榜只比較預設大小棋盤的成績（與 replay.check_rules 相同）
+        print(f"棋盤大小不是 {GRID_WIDTH}x{GRID_HEIGHT}，成績不寫入排行榜")
+        return
+    submit_results(results)
+
+
+if __name__ == "__main__":
+    main()